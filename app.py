@@ -1,3 +1,5 @@
+import logging
+import numpy as np
 import pandas as pd
 import dash
 from dash import dash_table
@@ -7,17 +9,67 @@ from dash import dcc
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 import base64
+import hashlib
 import io
+import json
+import os
 import dash_auth
-from optaloA3 import SquadAllocatorLP
-import plotly.express as px
-from dash_bootstrap_templates import load_figure_template
-load_figure_template(["cyborg", "darkly"])
+import diskcache
+from dash import DiskcacheManager
+from visao_macro import ARQUIVO_ALOCACOES, cache_visao_macro
+from cache_otimizacao import COLUNAS_REQUISITOS, CacheResultados, chave_otimizacao, chave_requisitos
+from paginacao import pagina_tabela
+
+# Modo do otimizador usado pelo botão "Otimizar": 'milp' (inteiro, um projeto por vez), 'lp' (relaxação)
+# ou 'portfolio' (todos os projetos num só MILP por rodada), com limite de tempo (s) e gap relativo por solve
+MODO_OTIMIZADOR = 'milp'
+LIMITE_TEMPO_OTIMIZADOR = 10
+GAP_OTIMIZADOR = 0.01
+
+# Número de processos para resolver projetos em paralelo (1 = em série). Nos dois casos um
+# colaborador é recomendado a no máximo um projeto (ver solve_project_without_conflicts),
+# então o resultado não depende deste valor
+TRABALHADORES_OTIMIZADOR = 1
+
+# Número de faixas de cor do heatmap da tabela (None = uma regra por valor distinto)
+FAIXAS_HEATMAP = 16
+
+# NSGA-II do botão "Fronteira de Pareto": tamanho da população e número de gerações por projeto
+POPULACAO_PARETO = 100
+GERACOES_PARETO = 50
+
+# Linhas por página das tabelas (paginação, ordenação e filtro feitos no servidor)
+TAMANHO_PAGINA = 50
+
+# Pasta base dos caches em disco: OPTALLOCATOR_CACHE ou a pasta deste arquivo (não a pasta atual)
+PASTA_CACHES = os.environ.get("OPTALLOCATOR_CACHE", os.path.dirname(os.path.abspath(__file__)))
+
+# Pasta do cache em disco usado pelos callbacks em segundo plano
+PASTA_CACHE_CALLBACKS = os.path.join(PASTA_CACHES, "cache_callbacks")
+
+# Cache das tabelas de recomendação (em memória e em disco, compartilhado entre processos)
+PASTA_CACHE_RESULTADOS = os.path.join(PASTA_CACHES, "cache_resultados")
+
+# Tabelas de recomendação exibidas (o navegador guarda só a chave), fora do cache de resultados
+PASTA_CACHE_TABELAS = os.path.join(PASTA_CACHES, "cache_tabelas")
+
+logger = logging.getLogger(__name__)
 
-# Inicializa o DataFrame vazio
-df_alocacoes = pd.DataFrame(columns=['PROJETO_ID', 'CARGO', 'SETOR', 'CLASSE', 'QUANTIDADE', 'HORAS', 'PROJETOS', 'CUSTO'])
 csv_data = pd.DataFrame()
 
+def tabela_requisitos(registros):
+    """
+    Monta o DataFrame de requisitos a partir dos registros do df-alocacoes-store.
+
+    Os requisitos ficam no navegador e chegam aos callbacks como State: um job
+    em segundo plano ou outro worker do gunicorn não dependem da memória do
+    processo que recebeu o upload.
+
+    Returns:
+    - pd.DataFrame: Requisitos com as colunas de COLUNAS_REQUISITOS (vazio se não houver registros).
+    """
+    return pd.DataFrame(registros or [], columns=COLUNAS_REQUISITOS)
+
 # Função para realizar as análises no DataFrame carregado
 import pandas as pd
 
@@ -59,182 +111,104 @@ def analisar_csv(df, df_alocacoes):
 
 def gerar_visao_macro():
     """
-    Carrega o arquivo "alocamento_colaboradores_projetos.csv" e gera a visão macro.
+    Retorna a visão macro do arquivo "alocamento_colaboradores_projetos.csv".
+
+    O resultado vem do cache compartilhado e só é recalculado quando o arquivo
+    muda; o DataFrame retornado não deve ser modificado.
 
     Returns:
     - pd.DataFrame: Retorna o DataFrame da visão macro.
     """
-    alocamentos = pd.read_csv("data_input/alocamento_colaboradores_projetos.csv")
-
-    visao_macro = alocamentos.groupby('col_matricula').agg({
-        'col_custo': 'first',
-        'col_cargo': 'first',
-        'col_setor': 'first',
-        'col_classe': 'first',
-        'pro_number': 'nunique',
-        'horas_alocadas': 'sum'
-    }).reset_index()
-
-    visao_macro.columns = ['col_nome', 'col_custo_hora', 'col_cargo', 'col_setor', 'col_classe',
-                            'col_number_proj', 'col_hora_alocada']
-    return visao_macro
+    return cache_visao_macro.get(ARQUIVO_ALOCACOES)
 
 VALID_USERNAME_PASSWORD_PAIRS = {
     'admin': 'admin'
 }
 
 # Configurando o aplicativo Dash
+cache_resultados = CacheResultados(pasta=PASTA_CACHE_RESULTADOS)
+# Sem verificar_roster: uma tabela na tela continua disponível quando o roster muda
+cache_tabelas = CacheResultados(max_entradas=32, pasta=PASTA_CACHE_TABELAS, max_bytes_disco=1024 * 1024 * 1024)
+
+# Gerenciador local (em disco) dos callbacks em segundo plano, sem broker externo
+cache_callbacks = diskcache.Cache(PASTA_CACHE_CALLBACKS)
+background_callback_manager = DiskcacheManager(cache_callbacks)
+
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY],
-                suppress_callback_exceptions=True)
+                suppress_callback_exceptions=True,
+                background_callback_manager=background_callback_manager)
 auth = dash_auth.BasicAuth(
     app,
     VALID_USERNAME_PASSWORD_PAIRS
 )
 
-df_graph = gerar_visao_macro().groupby(['col_cargo', 'col_classe']).size().reset_index(name='count')
-df_graph.columns = ['Cargo','Classe','Quantidade']
+def grafico_distribuicao(visao):
+    """
+    Gráfico de barras da distribuição de colaboradores por cargo e classe.
 
-# Estilo global do aplicativo
-app.layout = html.Div([
-    
-    html.Img(
-        src="https://a3data.com.br/wp-content/themes/a3data/img/logo_original.png",
-        style={'width': '150px', 'height': 'auto', 'position': 'absolute', 'top': '20px', 'left': '20px'}
-    ),
+    plotly.express e o template "darkly" só são carregados na primeira chamada.
+    """
+    import plotly.express as px
+    import plotly.io as pio
+    if 'darkly' not in pio.templates:
+        from dash_bootstrap_templates import load_figure_template
+        load_figure_template("darkly")
 
-    html.H1('Otimização da Alocação', style={'textAlign': 'center', 'font-family': 'Verdana','margin-bottom': '20px','top-bottom': '20px', 'font-weight': 'bold'}),
+    df_graph = visao.groupby(['col_cargo', 'col_classe'], observed=True).size().reset_index(name='count')
+    df_graph.columns = ['Cargo','Classe','Quantidade']
+    return px.bar(df_graph,x='Cargo', y='Quantidade', color='Classe', barmode='group', labels={'Cargo': 'Cargo', 'Quantidade': 'Quantidade'}, template='darkly')
 
-    # Título da tabela
-    html.Div([
-        html.H2("Tabela de Distribuição de Colaboradores", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
-        
-        # Tabela 1: Distribuição de Colaboradores
-        html.Div(style={'background-color': 'black', 'color': 'white'}, children=[
-            dcc.Graph(
-                id='bar-chart',
-                figure=px.bar(df_graph,x='Cargo', y='Quantidade', color='Classe', barmode='group', labels={'Cargo': 'Cargo', 'Quantidade': 'Quantidade'}, template='darkly'),
-                style={'background-color': 'black', 'color': 'white','font-size': '24px','font-family': 'Verdana'}
-            )
-        ]),
+# Layout montado na primeira página servida e refeito só quando o roster muda
+_layout = {"versao": None, "layout": None}
+
+def construir_layout():
+    """
+    Monta o layout do aplicativo a partir de uma única leitura da visão macro.
 
-        html.H2("Tabela de Mapa de Calor dos Colaboradores", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+    Returns:
+    - html.Div: O layout, reaproveitado enquanto o arquivo de alocações não mudar.
+    """
+    versao = cache_visao_macro.identidade(ARQUIVO_ALOCACOES)
+    if _layout["versao"] == versao:
+        return _layout["layout"]
 
-        # Dropdown para selecionar a coluna do mapa de calor
-        dcc.Dropdown(
-            id='heatmap-column',
-            options=[
-                {'label': 'Número de Projetos', 'value': 'col_number_proj'},
-                {'label': 'Horas Alocadas', 'value': 'col_hora_alocada'},
-                {'label': 'Custo', 'value': 'col_custo_hora'}
-            ],
-            value='col_hora_alocada',  # Valor padrão
-            style={
-                'width': '100%',
-                'margin': '0 auto',
-                'textAlign': 'center',
-                'font-family': 'Verdana',
-                'font-weight': 'bold',
-                'fontSize': '12px',
-                'color': 'black',  # Define a cor do texto para branco
-                'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
-                'border': 'none', # Remove a borda
-            },
-        ),
-    ]),
-    
-    # Tabela 2: Mapa de Calor
-    dash_table.DataTable(
-        id='table2',
-        columns=[
-            {"name": "Matricula", "id": "col_nome"},
-            {"name": "Cargo", "id": "col_cargo"},
-            {"name": "Setor", "id": "col_setor"},
-            {"name": "Classe", "id": "col_classe"},
-            {"name": "Número de Projetos", "id": "col_number_proj"},
-            {"name": "Horas Alocadas", "id": "col_hora_alocada"},
-            {"name": "Custo", "id": "col_custo_hora"}
-        ],
-        style_as_list_view=True,
-        style_header={'backgroundColor': '#f5009cff', 'color': '#ffdd19', 'font-weight': 'bold', 'textAlign': 'center', 'fontSize': '20px', 'font-family': 'Verdana'},
-        style_table={'height': '400px', 'overflowY': 'auto', 'marginTop': '20px', 'marginBottom': '20px'},
-        filter_action="native",
-        style_filter={'backgroundColor': '#061d74',
-        'color': 'white',
-        'fontWeight': 'bold'}
-    ),
-
-    html.H3('Construa uma Tabela de Alocação para um Novo Projeto', style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+    visao = gerar_visao_macro()
+
+    # Estilo global do aplicativo
+    layout = html.Div([
     
-    # Dropdown para selecionar o cargo
-    dcc.Upload(
-        id='upload-data',
-        children=html.Div([
-            'Arraste e solte ou selecione arquivo CSV com os dados de alocação',
-            html.A('')
-        ]),
-        style={
-            'width': '50%',
-            'height': '60px',
-            'lineHeight': '60px',
-            'borderWidth': '1px',
-            'borderStyle': 'dashed',
-            'borderRadius': '5px',
-            'textAlign': 'center',
-            'margin': '10px auto',
-            'marginBottom': '20px',
-            'marginTop': '20px'
-        },
-        multiple=False
-    ),
-
-    html.Div([
+        html.Img(
+            src="https://a3data.com.br/wp-content/themes/a3data/img/logo_original.png",
+            style={'width': '150px', 'height': 'auto', 'position': 'absolute', 'top': '20px', 'left': '20px'}
+        ),
+
+        html.H1('Otimização da Alocação', style={'textAlign': 'center', 'font-family': 'Verdana','margin-bottom': '20px','top-bottom': '20px', 'font-weight': 'bold'}),
+
+        # Título da tabela
         html.Div([
+            html.H2("Tabela de Distribuição de Colaboradores", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+        
+            # Tabela 1: Distribuição de Colaboradores
+            html.Div(style={'background-color': 'black', 'color': 'white'}, children=[
+                dcc.Graph(
+                    id='bar-chart',
+                    figure=grafico_distribuicao(visao),
+                    style={'background-color': 'black', 'color': 'white','font-size': '24px','font-family': 'Verdana'}
+                )
+            ]),
+
+            html.H2("Tabela de Mapa de Calor dos Colaboradores", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+
+            # Dropdown para selecionar a coluna do mapa de calor
             dcc.Dropdown(
-                id='cargo-dropdown',
-                options=[{'label': cargo, 'value': cargo} for cargo in gerar_visao_macro()['col_cargo'].unique()],
-                value=None,
-                placeholder='Cargo',
-                style={
-                    'marginTop': '20px', 
-                    'marginBottom': '20px',
-                    'width': '100%',
-                    'margin': '0 auto',
-                    'textAlign': 'center',
-                    'font-family': 'Verdana',
-                    'font-weight': 'bold',
-                    'fontSize': '12px',
-                    'color': 'black',  # Define a cor do texto para branco
-                    'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
-                    'border': 'none'  # Remove a borda
-                },
-            ),
-            dcc.Dropdown(
-                id='setor-dropdown',
-                options=[{'label': setor, 'value': setor} for setor in gerar_visao_macro()['col_setor'].unique()],
-                value=None,
-                placeholder='Setor',
-                style={
-                    'marginTop': '20px', 
-                    'marginBottom': '20px',
-                    'width': '100%',
-                    'margin': '0 auto',
-                    'textAlign': 'center',
-                    'font-family': 'Verdana',
-                    'font-weight': 'bold',
-                    'fontSize': '12px',
-                    'color': 'black',  # Define a cor do texto para branco
-                    'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
-                    'border': 'none'  # Remove a borda
-                },
-            ),
-            dcc.Dropdown(
-                id='classe-dropdown',
-                options=[{'label': classe, 'value': classe} for classe in gerar_visao_macro()['col_classe'].unique()],
-                value=None,
-                placeholder='Classe',
+                id='heatmap-column',
+                options=[
+                    {'label': 'Número de Projetos', 'value': 'col_number_proj'},
+                    {'label': 'Horas Alocadas', 'value': 'col_hora_alocada'},
+                    {'label': 'Custo', 'value': 'col_custo_hora'}
+                ],
+                value='col_hora_alocada',  # Valor padrão
                 style={
-                    'marginTop': '20px', 
-                    'marginBottom': '20px',
                     'width': '100%',
                     'margin': '0 auto',
                     'textAlign': 'center',
@@ -243,92 +217,385 @@ app.layout = html.Div([
                     'fontSize': '12px',
                     'color': 'black',  # Define a cor do texto para branco
                     'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
-                    'border': 'none'  # Remove a borda
+                    'border': 'none', # Remove a borda
                 },
             ),
-        ],
-        style={'text-align': 'center',                    
-               'marginTop': '20px', 
-                'marginBottom': '20px'}  # Centraliza os dropdowns na div
-        ),
-    ]),
-
-    html.Div([
-        dcc.Input(
-            id='horas-input',
-            type='number',
-            placeholder='Horas Alocadas',
-            style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
-            min=0  # Valor mínimo deve ser maior ou igual a 0
-        ),
-        dcc.Input(
-            id='projetos-input',
-            type='number',
-            placeholder='Número de Projetos',
-            style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
-            min=0  # Valor mínimo deve ser maior ou igual a 0
-        ),
-        dcc.Input(
-            id='custo-input',
-            type='number',
-            placeholder='Custo Máximo',
-            style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
-            min=0  # Valor mínimo deve ser maior ou igual a 0
+        ]),
+    
+        # Tabela 2: Mapa de Calor
+        dash_table.DataTable(
+            id='table2',
+            columns=[
+                {"name": "Matricula", "id": "col_nome"},
+                {"name": "Cargo", "id": "col_cargo"},
+                {"name": "Setor", "id": "col_setor"},
+                {"name": "Classe", "id": "col_classe"},
+                {"name": "Número de Projetos", "id": "col_number_proj"},
+                {"name": "Horas Alocadas", "id": "col_hora_alocada"},
+                {"name": "Custo", "id": "col_custo_hora"}
+            ],
+            style_as_list_view=True,
+            style_header={'backgroundColor': '#f5009cff', 'color': '#ffdd19', 'font-weight': 'bold', 'textAlign': 'center', 'fontSize': '20px', 'font-family': 'Verdana'},
+            style_table={'height': '400px', 'overflowY': 'auto', 'marginTop': '20px', 'marginBottom': '20px'},
+            page_action="custom",
+            page_current=0,
+            page_size=TAMANHO_PAGINA,
+            sort_action="custom",
+            sort_mode="multi",
+            sort_by=[],
+            filter_action="custom",
+            filter_query='',
+            style_filter={'backgroundColor': '#061d74',
+            'color': 'white',
+            'fontWeight': 'bold'}
         ),
 
-        dcc.Input(
-            id='quantidade-col-input',
-            type='number',
-            placeholder='Quantidade Colaboradores',
-            style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
-            min=0  # Valor mínimo deve ser maior ou igual a 0
+        html.H3('Construa uma Tabela de Alocação para um Novo Projeto', style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+    
+        # Dropdown para selecionar o cargo
+        dcc.Upload(
+            id='upload-data',
+            children=html.Div([
+                'Arraste e solte ou selecione arquivo CSV com os dados de alocação',
+                html.A('')
+            ]),
+            style={
+                'width': '50%',
+                'height': '60px',
+                'lineHeight': '60px',
+                'borderWidth': '1px',
+                'borderStyle': 'dashed',
+                'borderRadius': '5px',
+                'textAlign': 'center',
+                'margin': '10px auto',
+                'marginBottom': '20px',
+                'marginTop': '20px'
+            },
+            multiple=False
         ),
 
-        dcc.Input(
-            id='nome-projeto-input',
-            type='text',
-            placeholder='Nome Projeto',
-            style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'}
-        ),
+        html.Div([
+            html.Div([
+                dcc.Dropdown(
+                    id='cargo-dropdown',
+                    options=[{'label': cargo, 'value': cargo} for cargo in visao['col_cargo'].unique()],
+                    value=None,
+                    placeholder='Cargo',
+                    style={
+                        'marginTop': '20px', 
+                        'marginBottom': '20px',
+                        'width': '100%',
+                        'margin': '0 auto',
+                        'textAlign': 'center',
+                        'font-family': 'Verdana',
+                        'font-weight': 'bold',
+                        'fontSize': '12px',
+                        'color': 'black',  # Define a cor do texto para branco
+                        'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
+                        'border': 'none'  # Remove a borda
+                    },
+                ),
+                dcc.Dropdown(
+                    id='setor-dropdown',
+                    options=[{'label': setor, 'value': setor} for setor in visao['col_setor'].unique()],
+                    value=None,
+                    placeholder='Setor',
+                    style={
+                        'marginTop': '20px', 
+                        'marginBottom': '20px',
+                        'width': '100%',
+                        'margin': '0 auto',
+                        'textAlign': 'center',
+                        'font-family': 'Verdana',
+                        'font-weight': 'bold',
+                        'fontSize': '12px',
+                        'color': 'black',  # Define a cor do texto para branco
+                        'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
+                        'border': 'none'  # Remove a borda
+                    },
+                ),
+                dcc.Dropdown(
+                    id='classe-dropdown',
+                    options=[{'label': classe, 'value': classe} for classe in visao['col_classe'].unique()],
+                    value=None,
+                    placeholder='Classe',
+                    style={
+                        'marginTop': '20px', 
+                        'marginBottom': '20px',
+                        'width': '100%',
+                        'margin': '0 auto',
+                        'textAlign': 'center',
+                        'font-family': 'Verdana',
+                        'font-weight': 'bold',
+                        'fontSize': '12px',
+                        'color': 'black',  # Define a cor do texto para branco
+                        'background-color': '#f5009cff',  # Define a cor de fundo no mesmo estilo que o cabeçalho
+                        'border': 'none'  # Remove a borda
+                    },
+                ),
+            ],
+            style={'text-align': 'center',                    
+                   'marginTop': '20px', 
+                    'marginBottom': '20px'}  # Centraliza os dropdowns na div
+            ),
+        ]),
 
+        html.Div([
+            dcc.Input(
+                id='horas-input',
+                type='number',
+                placeholder='Horas Alocadas',
+                style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
+                min=0  # Valor mínimo deve ser maior ou igual a 0
+            ),
+            dcc.Input(
+                id='projetos-input',
+                type='number',
+                placeholder='Número de Projetos',
+                style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
+                min=0  # Valor mínimo deve ser maior ou igual a 0
+            ),
+            dcc.Input(
+                id='custo-input',
+                type='number',
+                placeholder='Custo Máximo',
+                style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
+                min=0  # Valor mínimo deve ser maior ou igual a 0
+            ),
 
-        html.Button(
-            'Adicionar',
-            id='add-allocation-button',
-            style={
-                'margin-top': '10px',
-                'margin-left': 'auto',
-                'margin-right': 'auto',
-                'display': 'block', 
-                'width': '30%',
-                'text-align': 'center',
-                'backgroundColor': '#f5009cff',
-                'color': '#ffdd19',
-                'border': 'none',
-                'font-weight': 'bold',
-                'font-family': 'Verdana',
-                'padding': '10px 20px',
-                'margin': '20px auto',
-                'cursor': 'pointer',
-            }
-        )
-    ], style={'text-align': 'center'}),
+            dcc.Input(
+                id='quantidade-col-input',
+                type='number',
+                placeholder='Quantidade Colaboradores',
+                style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'},
+                min=0  # Valor mínimo deve ser maior ou igual a 0
+            ),
 
-    html.Div([
-        html.H3('Alocações de Projetos', style={'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
-        # Tabela para mostrar as alocações feitas
+            dcc.Input(
+                id='nome-projeto-input',
+                type='text',
+                placeholder='Nome Projeto',
+                style={'margin-right': '10px','font-family': 'Verdana','text-align': 'center'}
+            ),
+
+
+            html.Button(
+                'Adicionar',
+                id='add-allocation-button',
+                style={
+                    'margin-top': '10px',
+                    'margin-left': 'auto',
+                    'margin-right': 'auto',
+                    'display': 'block', 
+                    'width': '30%',
+                    'text-align': 'center',
+                    'backgroundColor': '#f5009cff',
+                    'color': '#ffdd19',
+                    'border': 'none',
+                    'font-weight': 'bold',
+                    'font-family': 'Verdana',
+                    'padding': '10px 20px',
+                    'margin': '20px auto',
+                    'cursor': 'pointer',
+                }
+            )
+        ], style={'text-align': 'center'}),
+
+        html.Div([
+            html.H3('Alocações de Projetos', style={'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+            # Tabela para mostrar as alocações feitas
+            dash_table.DataTable(
+                id='allocation-table',
+                columns=[
+                    {"name": "Nome Projeto", "id": "PROJETO_ID", 'editable': True},
+                    {"name": "Cargo", "id": "CARGO", 'editable': True},
+                    {"name": "Setor", "id": "SETOR", 'editable': True},
+                    {"name": "Classe", "id": "CLASSE", 'editable': True},
+                    {"name": "Horas Alocadas", "id": "HORAS", 'editable': True},
+                    {"name": "Custo", "id": "CUSTO", 'editable': True},
+                    {"name": "Quantidade", "id": "QUANTIDADE", 'editable': True},
+                ],
+                editable=True, 
+                style_as_list_view=True,
+                style_header={'backgroundColor': '#f5009cff', 'color': '#ffdd19', 'font-weight': 'bold', 'textAlign': 'center', 'fontSize': '20px', 'font-family': 'Verdana'},
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': 'rgb(50, 50, 50)',
+                        'color': 'white',
+                        'textAlign': 'center',
+                        'font-family': 'Verdana'
+                    },
+                    {
+                        'if': {'row_index': 'even'},
+                        'backgroundColor': 'rgb(40, 40, 40)',
+                        'color': 'white',
+                        'textAlign': 'center',
+                        'font-family': 'Verdana'
+                    },
+                ],
+                style_table={'height': '150px', 'overflowY': 'auto', 'marginTop': '20px', 'marginBottom': '20px'},
+                data=[],
+                page_action="custom",
+                page_current=0,
+                page_size=TAMANHO_PAGINA,
+                sort_action="custom",
+                sort_mode="multi",
+                sort_by=[],
+                filter_action="custom",
+                filter_query='',
+            ),
+        ], style={'text-align': 'center'}),
+
+        html.H2("Pesos do otimizador", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+        html.Div([
+                # Peso de horas
+                html.Div(
+                    [
+                        html.H4('Peso de hora:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
+                        dcc.Input(
+                            id='weight-hours-input',
+                            type='number',
+                            placeholder=1,
+                            style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
+                            min=0  # Valor mínimo deve ser maior ou igual a 0
+                        )],
+                        style={'display': 'inline-block', 'margin-right': '20px'}
+                    ),
+
+                # Peso de projetos
+                html.Div([
+                        html.H4('Peso de projeto:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
+                        dcc.Input(
+                            id='weight-projects-input',
+                            type='number',
+                            placeholder=1,
+                            style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
+                            min=0  # Valor mínimo deve ser maior ou igual a 0
+                        )],
+                        style={'display': 'inline-block', 'margin-right': '20px'}
+                    ),
+
+                # Peso de custo
+                html.Div(
+                    [
+                        html.H4('Peso de custo:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
+                        dcc.Input(
+                            id='weight-cost-input',
+                            type='number',
+                            placeholder=1,
+                            style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
+                            min=0  # Valor mínimo deve ser maior ou igual a 0
+                        )],
+                        style={'display': 'inline-block', 'margin-right': '20px'}
+                    ),
+
+                # Número de Recomendações
+                html.Div(
+                    [
+                        html.H4('Número de Recomendações:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
+                        dcc.Input(
+                            id='number-recommendations-input',
+                            type='number',
+                            placeholder=1,
+                            style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
+                            min=0  # Valor mínimo deve ser maior ou igual a 0
+                        )],
+                        style={'display': 'inline-block'}
+                    ),
+                ],
+                style={'text-align': 'center'}
+            ),
+
+        html.Div(
+            [
+                html.Button(
+                    'Otimizar Alocação',
+                    id='otimizar-button',
+                    disabled=True,
+                    style={
+                        'width': '50%',
+                        'height': '60px',
+                        'lineHeight': '60px',
+                        'borderWidth': '1px',
+                        'borderStyle': 'dashed',
+                        'borderRadius': '5px',
+                        'textAlign': 'center',
+                        'margin': '10px auto',
+                        'marginBottom': '20px',
+                        'marginTop': '20px',
+                        'backgroundColor': '#f5009cff',
+                        'color': '#ffdd19',
+                        'border': 'none',
+                        'font-weight': 'bold',
+                        'font-family': 'Verdana',
+                        'cursor': 'pointer',
+                    },
+                ),
+                html.Button(
+                    'Cancelar',
+                    id='cancelar-button',
+                    disabled=True,
+                    style={
+                        'width': '20%',
+                        'height': '60px',
+                        'lineHeight': '60px',
+                        'borderRadius': '5px',
+                        'textAlign': 'center',
+                        'margin': '10px auto',
+                        'marginLeft': '10px',
+                        'backgroundColor': '#061d74',
+                        'color': 'white',
+                        'border': 'none',
+                        'font-weight': 'bold',
+                        'font-family': 'Verdana',
+                        'cursor': 'pointer',
+                    },
+                ),
+                html.Button(
+                    'Fronteira de Pareto',
+                    id='pareto-button',
+                    disabled=True,
+                    style={
+                        'width': '20%',
+                        'height': '60px',
+                        'lineHeight': '60px',
+                        'borderRadius': '5px',
+                        'textAlign': 'center',
+                        'margin': '10px auto',
+                        'marginLeft': '10px',
+                        'backgroundColor': '#061d74',
+                        'color': '#ffdd19',
+                        'border': 'none',
+                        'font-weight': 'bold',
+                        'font-family': 'Verdana',
+                        'cursor': 'pointer',
+                    },
+                ),
+                html.Div([
+                    html.Progress(id='otimizar-progresso', value='0', max='1', style={'width': '50%'}),
+                    html.Div(id='otimizar-status', style={'font-family': 'Verdana', 'color': 'white', 'fontSize': '12px'}),
+                    html.Div(id='pareto-status', style={'font-family': 'Verdana', 'color': 'white', 'fontSize': '12px'}),
+                ]),
+            ],
+        style={'text-align': 'center'}),
+
+        html.H2("Tabela de Recomendação de Alocação", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
+        html.Div(id='recomendacao-status', style={'textAlign': 'center', 'font-family': 'Verdana', 'color': '#ffdd19', 'fontSize': '14px'}),
+        # Tabela para mostrar as recomendações da otimização
         dash_table.DataTable(
-            id='allocation-table',
+            id='recommendation-table',
             columns=[
-                {"name": "Nome Projeto", "id": "PROJETO_ID", 'editable': True},
-                {"name": "Cargo", "id": "CARGO", 'editable': True},
-                {"name": "Setor", "id": "SETOR", 'editable': True},
-                {"name": "Classe", "id": "CLASSE", 'editable': True},
-                {"name": "Horas Alocadas", "id": "HORAS", 'editable': True},
-                {"name": "Custo", "id": "CUSTO", 'editable': True},
-                {"name": "Quantidade", "id": "QUANTIDADE", 'editable': True},
+                {"name": "Nome Projeto", "id": "PROJETO_ID"},
+                {"name": "Matricula", "id": "col_nome"},
+                {"name": "Cargo", "id": "col_cargo"},
+                {"name": "Setor", "id": "col_setor"},
+                {"name": "Classe", "id": "col_classe"},
+                {"name": "Horas Alocadas", "id": "col_hora_alocada"},
+                {"name": "Custo", "id": "col_custo_hora"},
+                {"name": "Prioridade de Recomendação", "id": "RECOMENDACAO_PRIORIDADE"},
             ],
-            editable=True, 
+            data=[],
             style_as_list_view=True,
             style_header={'backgroundColor': '#f5009cff', 'color': '#ffdd19', 'font-weight': 'bold', 'textAlign': 'center', 'fontSize': '20px', 'font-family': 'Verdana'},
             style_data_conditional=[
@@ -347,151 +614,43 @@ app.layout = html.Div([
                     'font-family': 'Verdana'
                 },
             ],
-            style_table={'height': '150px', 'overflowY': 'auto', 'marginTop': '20px', 'marginBottom': '20px'},
-            data=[],
+            style_table={'height': '400px', 'overflowY': 'auto', 'marginTop': '20px', 'marginBottom': '20px'},
+            page_action="custom",
+            page_current=0,
+            page_size=TAMANHO_PAGINA,
+            sort_action="custom",
+            sort_mode="multi",
+            sort_by=[],
+            filter_action="custom",
+            filter_query='',
+            style_filter={'backgroundColor': '#061d74',
+            'color': 'white',
+            'fontWeight': 'bold'
+            }
         ),
-    ], style={'text-align': 'center'}),
-
-    html.H2("Pesos do otimizador", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
-    html.Div([
-            # Peso de horas
-            html.Div(
-                [
-                    html.H4('Peso de hora:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
-                    dcc.Input(
-                        id='weight-hours-input',
-                        type='number',
-                        placeholder=1,
-                        style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
-                        min=0  # Valor mínimo deve ser maior ou igual a 0
-                    )],
-                    style={'display': 'inline-block', 'margin-right': '20px'}
-                ),
 
-            # Peso de projetos
-            html.Div([
-                    html.H4('Peso de projeto:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
-                    dcc.Input(
-                        id='weight-projects-input',
-                        type='number',
-                        placeholder=1,
-                        style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
-                        min=0  # Valor mínimo deve ser maior ou igual a 0
-                    )],
-                    style={'display': 'inline-block', 'margin-right': '20px'}
-                ),
+        dcc.Store(id='csv-data-store', data=None),
+        dcc.Store(id='df-alocacoes-store', data=None),
+        dcc.Store(id='pareto-store', data=None),
+        # Chave da tabela de recomendação guardada em cache_resultados (só a página visível vai ao navegador)
+        dcc.Store(id='recommendation-store', data=None)
 
-            # Peso de custo
-            html.Div(
-                [
-                    html.H4('Peso de custo:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
-                    dcc.Input(
-                        id='weight-cost-input',
-                        type='number',
-                        placeholder=1,
-                        style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
-                        min=0  # Valor mínimo deve ser maior ou igual a 0
-                    )],
-                    style={'display': 'inline-block', 'margin-right': '20px'}
-                ),
-
-            # Número de Recomendações
-            html.Div(
-                [
-                    html.H4('Número de Recomendações:', style={'font-family': 'Verdana', 'font-weight': 'bold', 'color': 'white', 'fontSize': '12px','text-align': 'center'}),
-                    dcc.Input(
-                        id='number-recommendations-input',
-                        type='number',
-                        placeholder=1,
-                        style={'margin-right': '10px', 'font-family': 'Verdana', 'text-align': 'center'},
-                        min=0  # Valor mínimo deve ser maior ou igual a 0
-                    )],
-                    style={'display': 'inline-block'}
-                ),
-            ],
-            style={'text-align': 'center'}
-        ),
+    ])
 
-    html.Div(
-        [
-            html.Button(
-                'Otimizar Alocação',
-                id='otimizar-button',
-                disabled=True,
-                style={
-                    'width': '50%',
-                    'height': '60px',
-                    'lineHeight': '60px',
-                    'borderWidth': '1px',
-                    'borderStyle': 'dashed',
-                    'borderRadius': '5px',
-                    'textAlign': 'center',
-                    'margin': '10px auto',
-                    'marginBottom': '20px',
-                    'marginTop': '20px',
-                    'backgroundColor': '#f5009cff',
-                    'color': '#ffdd19',
-                    'border': 'none',
-                    'font-weight': 'bold',
-                    'font-family': 'Verdana',
-                    'cursor': 'pointer',
-                },
-            ),
-        ],
-    style={'text-align': 'center'}),
-
-    html.H2("Tabela de Recomendação de Alocação", style={'padding': '10px', 'margin-bottom': '10px', 'textAlign': 'center','font-family': 'Verdana', 'font-weight': 'bold','color':'white','fontSize': '25px'}),
-    # Tabela para mostrar as recomendações da otimização
-    dash_table.DataTable(
-        id='recommendation-table',
-        columns=[
-            {"name": "Nome Projeto", "id": "PROJETO_ID"},
-            {"name": "Matricula", "id": "col_nome"},
-            {"name": "Cargo", "id": "col_cargo"},
-            {"name": "Setor", "id": "col_setor"},
-            {"name": "Classe", "id": "col_classe"},
-            {"name": "Horas Alocadas", "id": "col_hora_alocada"},
-            {"name": "Custo", "id": "col_custo_hora"},
-            {"name": "Prioridade de Recomendação", "id": "RECOMENDACAO_PRIORIDADE"},
-        ],
-        data=[],
-        style_as_list_view=True,
-        style_header={'backgroundColor': '#f5009cff', 'color': '#ffdd19', 'font-weight': 'bold', 'textAlign': 'center', 'fontSize': '20px', 'font-family': 'Verdana'},
-        style_data_conditional=[
-            {
-                'if': {'row_index': 'odd'},
-                'backgroundColor': 'rgb(50, 50, 50)',
-                'color': 'white',
-                'textAlign': 'center',
-                'font-family': 'Verdana'
-            },
-            {
-                'if': {'row_index': 'even'},
-                'backgroundColor': 'rgb(40, 40, 40)',
-                'color': 'white',
-                'textAlign': 'center',
-                'font-family': 'Verdana'
-            },
-        ],
-        style_table={'height': '400px', 'overflowY': 'auto', 'marginTop': '20px', 'marginBottom': '20px'},
-        filter_action="native",
-        style_filter={'backgroundColor': '#061d74',
-        'color': 'white',
-        'fontWeight': 'bold'
-        }
-    ),
+    layout.template = "plotly_dark"
+    layout.paper_bgcolor = 'black'
+    layout.plot_bgcolor = 'black'
+    layout.font = {'color': 'white'}
+    layout.xaxis_title_font = {'size': 24}
+    layout.yaxis_title_font = {'size': 24}
 
-    dcc.Store(id='csv-data-store', data=None),
-    dcc.Store(id='df-alocacoes-store', data=None)
+    _layout["versao"], _layout["layout"] = versao, layout
+    return layout
 
-])
+app.layout = construir_layout
 
-app.layout.template = "plotly_dark"
-app.layout.paper_bgcolor = 'black'
-app.layout.plot_bgcolor = 'black'
-app.layout.font = {'color': 'white'}
-app.layout.xaxis_title_font = {'size': 24}
-app.layout.yaxis_title_font = {'size': 24}
+# Servidor WSGI para o gunicorn ("gunicorn app:server")
+server = app.server
 
 app.css.append_css({
     'external_url': (
@@ -500,18 +659,93 @@ app.css.append_css({
 })
 
 @app.callback(
-    Output('recommendation-table', 'data'),
+    Output('recommendation-store', 'data'),
+    Output('pareto-store', 'data', allow_duplicate=True),
+    Output('pareto-status', 'children', allow_duplicate=True),
     Input('otimizar-button', 'n_clicks'),
     State('weight-projects-input', 'value'),
     State('weight-hours-input', 'value'),
     State('weight-cost-input', 'value'),
     State('number-recommendations-input', 'value'),
+    State('df-alocacoes-store', 'data'),
+    background=True,
+    running=[
+        (Output('cancelar-button', 'disabled'), False, True),
+        (Output('otimizar-status', 'children'), 'Otimizando...', ''),
+    ],
+    cancel=[Input('cancelar-button', 'n_clicks')],
+    progress=[Output('otimizar-progresso', 'value'), Output('otimizar-progresso', 'max')],
     prevent_initial_call=True
 )
-def optimize_allocation(n_clicks, weight_projects, weight_hours, weight_cost, number_recommendations):
-    global df_alocacoes
+def optimize_allocation(set_progress, n_clicks, weight_projects, weight_hours, weight_cost, number_recommendations, requisitos):
+    # Executado em segundo plano: o worker web fica livre e o progresso é enviado a cada rodada
+    resultado = otimizar_alocacao(
+        tabela_requisitos(requisitos), n_clicks, weight_projects, weight_hours, weight_cost, number_recommendations,
+        progresso=set_progress
+    )
+    # A tabela agora é a do Otimizar: a fronteira antiga não pode mais sobrescrevê-la ao mudar os pesos
+    return guardar_tabela(resultado), None, 
+
+def guardar_tabela(registros):
+    """
+    Guarda os registros de uma tabela de recomendação em cache_tabelas.
 
-    allocation_df = df_alocacoes 
+    A chave é o hash do conteúdo; o navegador recebe só a chave e as páginas
+    são montadas por pagina_recomendacao.
+
+    Returns:
+    - str or None: Chave da tabela (None se não houver registros).
+    """
+    if registros is None:
+        return None
+    chave = 'tabela:' + hashlib.sha256(json.dumps(registros, sort_keys=True, default=str).encode()).hexdigest()
+    cache_tabelas.put(chave, registros)
+    return chave
+
+def pesos_otimizacao(weight_projects, weight_hours, weight_cost):
+    # Pesos negativos ou ausentes voltam para 1
+    try:
+        if weight_projects < 0:
+            weight_projects = 1
+
+        if weight_hours < 0:
+            weight_hours = 1
+
+        if weight_cost < 0:
+            weight_cost = 1
+    except:
+        weight_cost = 1
+        weight_hours = 1
+        weight_projects = 1
+
+    # Defina os pesos para priorização
+    return {
+        "minimize_projects": weight_projects,
+        "minimize_hours": weight_hours,
+        "minimize_cost": weight_cost
+    }
+
+def otimizar_alocacao(allocation_df, n_clicks, weight_projects, weight_hours, weight_cost, number_recommendations,
+                      progresso=None, estatisticas=None):
+    """
+    Gera a tabela de recomendação para os projetos de allocation_df.
+
+    Parameters:
+    - allocation_df (pd.DataFrame): Requisitos (ver tabela_requisitos).
+    - progresso (callable or None): Recebe (passo, total) a cada rodada de cada projeto.
+    - estatisticas (OptimizationStats or None): Recebe os tempos por fase (normalização,
+      índice, requisitos, solve, montagem da tabela) e as informações de cada solve.
+
+    Returns:
+    - list: Registros da tabela de recomendação.
+    """
+    # O otimizador (scipy/DEAP) só é importado no primeiro uso, fora da inicialização do app
+    from optaloA3 import (
+        SquadAllocatorLP, CandidatePool, OptimizationStats, RoleGroupIndex, solve_portfolio,
+        solve_project_without_conflicts, solve_projects_parallel
+    )
+
+    estatisticas = estatisticas if estatisticas is not None else OptimizationStats("otimizar_alocacao")
     df_recommendation = pd.DataFrame()
     nr_of = False
     df = gerar_visao_macro()
@@ -520,86 +754,117 @@ def optimize_allocation(n_clicks, weight_projects, weight_hours, weight_cost, nu
         number_recommendations = 1
 
     if n_clicks > 0:
-        
+        weights = pesos_otimizacao(weight_projects, weight_hours, weight_cost)
+
+        # Mesmos requisitos, pesos, número de recomendações e roster: devolve o resultado guardado
+        versao_roster = str(cache_visao_macro.identidade(ARQUIVO_ALOCACOES))
+        cache_resultados.verificar_roster(versao_roster)
+        configuracao_solver = {
+            "modo": MODO_OTIMIZADOR, "limite_tempo": LIMITE_TEMPO_OTIMIZADOR,
+            "gap": GAP_OTIMIZADOR, "trabalhadores": TRABALHADORES_OTIMIZADOR,
+        }
+        chave = chave_otimizacao(allocation_df, weights, number_recommendations, versao_roster, configuracao_solver)
+        with estatisticas.phase("cache"):
+            resultado = cache_resultados.get(chave)
+        if resultado is not None:
+            estatisticas.record(cache="hit")
+            estatisticas.log_summary()
+            if progresso is not None:
+                progresso(('1', '1'))
+            return resultado
+        estatisticas.record(cache="miss")
+
+        # Normaliza as colunas uma vez para todos os projetos
+        with estatisticas.phase("normalize"):
+            df_norm = df.copy()
+            df_norm['col_hora_alocada'] = df_norm['col_hora_alocada'] / df_norm['col_hora_alocada'].max()
+            df_norm['col_custo_hora'] = df_norm['col_custo_hora'] / df_norm['col_custo_hora'].max()
+            df_norm['col_number_proj'] = df_norm['col_number_proj'] / df_norm['col_number_proj'].max()
+
+        # Pool em arrays e índice (cargo, setor, classe) -> posições, montados uma vez
+        with estatisticas.phase("index"):
+            pool = CandidatePool.from_dataframe(df_norm)
+            indice = RoleGroupIndex(pool)
+
+        # Requisitos de cada projeto, na ordem de processamento
+        with estatisticas.phase("match"):
+            requisitos_projetos = {}
+            for projeto in allocation_df['PROJETO_ID'].value_counts().index:
+                squad = allocation_df[allocation_df['PROJETO_ID'] == projeto]
+                requisitos_projetos[projeto] = [
+                    (row['CARGO'], row['SETOR'], row['CLASSE'], row['QUANTIDADE'], row['HORAS'], row['PROJETOS'], row['CUSTO'])
+                    for _, row in allocation_df.iloc[squad.index].iterrows()
+                ]
+
+        # No modo 'portfolio' as resoluções por projeto (conflitos e reserva) usam o MILP
+        modo_projeto = 'milp' if MODO_OTIMIZADOR == 'portfolio' else MODO_OTIMIZADOR
+        solver_kwargs = {"mode": modo_projeto, "time_limit": LIMITE_TEMPO_OTIMIZADOR, "mip_gap": GAP_OTIMIZADOR}
+        estatisticas.record(collaborators=len(pool), projects=len(requisitos_projetos), solves=[])
+
+        # Com mais de um trabalhador os projetos são resolvidos em paralelo; os conflitos
+        # são resolvidos abaixo, na ordem dos projetos, igual à execução em série
+        rodadas_projetos = {}
+        if MODO_OTIMIZADOR == 'portfolio':
+            # Cada rodada aloca todos os projetos juntos; já sai sem conflitos
+            with estatisticas.phase("solve", portfolio=True):
+                rodadas_projetos = solve_portfolio(
+                    pool, requisitos_projetos, weights, number_recommendations, index=indice,
+                    time_limit=LIMITE_TEMPO_OTIMIZADOR, mip_gap=GAP_OTIMIZADOR
+                )
+        elif TRABALHADORES_OTIMIZADOR > 1 and len(requisitos_projetos) > 1:
+            with estatisticas.phase("solve", parallel=True):
+                rodadas_projetos = solve_projects_parallel(
+                    pool, requisitos_projetos, weights, number_recommendations,
+                    max_workers=TRABALHADORES_OTIMIZADOR, index=indice, resolve_conflicts=False, **solver_kwargs
+                )
+        ocupado = np.zeros(len(pool), dtype=bool)  # Colaboradores já recomendados a algum projeto
+
+        total_passos = max(len(requisitos_projetos) * number_recommendations, 1)
+        passo = 0
+        if progresso is not None:
+            progresso((str(passo), str(total_passos)))
+
         # Certifique-se de ajustar o código de otimização aqui
-        for projeto in allocation_df['PROJETO_ID'].value_counts().index:
-            print('\n *** ' + projeto + ' *** \n')
+        for projeto, requisitos in requisitos_projetos.items():
+            logger.debug('*** %s ***', projeto)
             squad = allocation_df[allocation_df['PROJETO_ID'] == projeto]
 
-            df_opt = df.copy()
-            df_opt_ori = df.copy()
-            
-            # Normaliza as colunas em df_opt
-            max_hora_alocada = df_opt['col_hora_alocada'].max()
-            max_custo_hora = df_opt['col_custo_hora'].max()
-            max_number_proj = df_opt['col_number_proj'].max()
-
-            df_opt['col_hora_alocada'] = df_opt['col_hora_alocada'] / max_hora_alocada
-            df_opt['col_custo_hora'] = df_opt['col_custo_hora'] / max_custo_hora
-            df_opt['col_number_proj'] = df_opt['col_number_proj'] / max_number_proj
-
-            try:
-                if weight_projects < 0:
-                    weight_projects = 1
-
-                if weight_hours < 0:
-                    weight_hours = 1
-
-                if weight_cost < 0:
-                    weight_cost = 1
-            except:
-                weight_cost = 1
-                weight_hours = 1
-                weight_projects = 1
-
-            # Defina os pesos para priorização
-            weights = {
-                "minimize_projects": weight_projects,
-                "minimize_hours": weight_hours,
-                "minimize_cost": weight_cost
-            }
-            
+            df_opt = df_norm[~ocupado]
+            df_opt_ori = df
+
+            # Monta o modelo uma vez; cada rodada remove os escolhidos e resolve de novo
+            with estatisticas.phase("solve", project=projeto):
+                rodadas = solve_project_without_conflicts(
+                    pool, requisitos, weights, number_recommendations, indice, ocupado,
+                    rodadas=rodadas_projetos.get(projeto), **solver_kwargs
+                )
+
             for nr in range(0, number_recommendations):
-                squad_allocator = SquadAllocatorLP(df_opt)
-                squad_allocator.set_weights(weights)
-
-                for index in squad.index:
-                    collaborator = allocation_df.iloc[index, :]
-                    squad_allocator.add_squad_requirement(
-                        collaborator['CARGO'], collaborator['SETOR'], collaborator['CLASSE'],
-                        collaborator['QUANTIDADE'], collaborator['HORAS'], collaborator['PROJETOS'],
-                        collaborator['CUSTO']
-                    )
-                
                 # Otimize a alocação
                 try:
-                    squad_allocator.optimize()
-                    allocation_results = squad_allocator.get_allocation_results()
-
-                    vet_collaborator = []
-
-                    for collaborator, allocation_value in allocation_results:
-                        vet_collaborator.append(collaborator)
-
-                    print(vet_collaborator)
-                    allocated_indices_LP = [df[df['col_nome'] == collaborator].index[0] for collaborator in vet_collaborator]
-
-                    if not (nr_of):
-                        df_recommendation = df_opt_ori[df_opt_ori['col_nome'].isin(vet_collaborator)]
-                        df_recommendation['PROJETO_ID'] = [projeto] * len(df_recommendation)
-                        df_recommendation['RECOMENDACAO_PRIORIDADE'] = ['ALLOCATION_' + str(nr + 1)] * len(df_recommendation)
-                        df_opt = df_opt[~df_opt['col_nome'].isin(vet_collaborator)]
-                        nr_of = True
-
-                    else:
-                        df_opt_aux = df_opt_ori[df_opt_ori['col_nome'].isin(vet_collaborator)]
-                        df_opt_aux['PROJETO_ID'] = [projeto] * len(df_opt_aux)
-                        df_opt_aux['RECOMENDACAO_PRIORIDADE'] = ['ALLOCATION_' + str(nr + 1)] * len(df_opt_aux)
-                        df_recommendation = pd.concat([df_recommendation, df_opt_aux], axis=0, ignore_index=True)
-                        df_opt = df_opt[~df_opt['col_nome'].isin(vet_collaborator)]
+                    posicoes, solve_info = rodadas[nr]
+                    vet_collaborator = list(pool.nomes[posicoes])
+
+                    logger.debug('%s', vet_collaborator)
+                    logger.debug('%s', solve_info)
+                    estatisticas.info["solves"].append(dict(solve_info, project=projeto, round=nr + 1))
+
+                    # As posições do pool são as mesmas linhas de df
+                    with estatisticas.phase("assemble"):
+                        df_opt_aux = df.iloc[posicoes].copy()
+                        df_opt_aux['PROJETO_ID'] = projeto
+                        df_opt_aux['RECOMENDACAO_PRIORIDADE'] = 'ALLOCATION_' + str(nr + 1)
+
+                        if not (nr_of):
+                            df_recommendation = df_opt_aux
+                            nr_of = True
+                        else:
+                            df_recommendation = pd.concat([df_recommendation, df_opt_aux], axis=0, ignore_index=True)
+
+                    df_opt = df_opt[~df_opt['col_nome'].isin(vet_collaborator)]
                 except:
                     try:
-                        squad_allocator = SquadAllocatorLP(df_opt)
+                        squad_allocator = SquadAllocatorLP(df_opt, mode=modo_projeto, time_limit=LIMITE_TEMPO_OTIMIZADOR, mip_gap=GAP_OTIMIZADOR)
                         squad_allocator.set_weights(weights)
                         for index in squad.index:
                             collaborator = allocation_df.iloc[index, :]
@@ -616,14 +881,15 @@ def optimize_allocation(n_clicks, weight_projects, weight_hours, weight_cost, nu
                                 for collaborator, allocation_value in allocation_results:
                                     vet_collaborator.append(collaborator)
 
-                                print(vet_collaborator)
-                                allocated_indices_LP = [df[df['col_nome'] == collaborator].index[0] for collaborator in vet_collaborator]
+                                logger.debug('%s', vet_collaborator)
+                                logger.debug('%s', squad_allocator.get_solve_info())
 
                                 if not (nr_of):
                                     df_recommendation = df_opt_ori[df_opt_ori['col_nome'].isin(vet_collaborator)]
                                     df_recommendation['PROJETO_ID'] = [projeto] * len(df_recommendation)
                                     df_recommendation['RECOMENDACAO_PRIORIDADE'] = ['ALLOCATION_' + str(nr + 1)] * len(df_recommendation)
                                     df_opt = df_opt[~df_opt['col_nome'].isin(vet_collaborator)]
+                                    ocupado |= np.isin(pool.nomes, vet_collaborator)
                                     nr_of = True
 
                                 else:
@@ -632,33 +898,196 @@ def optimize_allocation(n_clicks, weight_projects, weight_hours, weight_cost, nu
                                     df_opt_aux['RECOMENDACAO_PRIORIDADE'] = ['ALLOCATION_' + str(nr + 1)] * len(df_opt_aux)
                                     df_recommendation = pd.concat([df_recommendation, df_opt_aux], axis=0, ignore_index=True)
                                     df_opt = df_opt[~df_opt['col_nome'].isin(vet_collaborator)]
+                                    ocupado |= np.isin(pool.nomes, vet_collaborator)
                             except:
                                 continue
                     except:
                         pass
 
-        print(df_recommendation.head())
-        return df_recommendation.to_dict('records')
+                passo += 1
+                if progresso is not None:
+                    progresso((str(passo), str(total_passos)))
+
+        logger.debug('%s', df_recommendation.head())
+        with estatisticas.phase("to_records"):
+            resultado = df_recommendation.to_dict('records')
+        cache_resultados.put(chave, resultado)
+        estatisticas.log_summary()
+        return resultado
         
 @app.callback(
-    [Output('otimizar-button', 'disabled')],
-    Input('allocation-table', 'data'),
+    [Output('otimizar-button', 'disabled'),
+     Output('pareto-button', 'disabled')],
+    Input('df-alocacoes-store', 'data'),
     prevent_initial_call=True
 )
-def enable_optimize_button(data):
-    return [False] if data else [True]  # Habilita o botão se houver pelo menos uma linha na tabela
+def enable_optimize_button(requisitos):
+    return [False, False] if requisitos else [True, True]  # Habilita os botões se houver pelo menos uma linha na tabela
+
+def gerar_fronteiras_pareto(allocation_df, progresso=None):
+    """
+    Executa o NSGA-II uma vez por projeto sobre a visão macro normalizada.
+
+    Os squads são guardados pelos col_nome dos colaboradores, junto com a
+    identidade do arquivo de alocações e o hash dos requisitos usados, e não
+    por posições no pool.
+
+    Parameters:
+    - progresso (callable or None): Recebe (passo, total) ao fim de cada projeto.
+
+    Returns:
+    - dict: {"roster": identidade do arquivo, "requisitos": chave_requisitos(allocation_df),
+      "fronteiras": projeto -> pontos ({"nomes", "objetivos"})}, serializável para o dcc.Store.
+    """
+    from optaloA3 import SquadAllocatorGA, CandidatePool, RoleGroupIndex
+
+    versao_roster = str(cache_visao_macro.identidade(ARQUIVO_ALOCACOES))
+    df = gerar_visao_macro()
+    df_norm = df.copy()
+    df_norm['col_hora_alocada'] = df_norm['col_hora_alocada'] / df_norm['col_hora_alocada'].max()
+    df_norm['col_custo_hora'] = df_norm['col_custo_hora'] / df_norm['col_custo_hora'].max()
+    df_norm['col_number_proj'] = df_norm['col_number_proj'] / df_norm['col_number_proj'].max()
+
+    pool = CandidatePool.from_dataframe(df_norm)
+    indice = RoleGroupIndex(pool)
+
+    projetos = allocation_df['PROJETO_ID'].value_counts().index
+    fronteiras = {}
+    for passo, projeto in enumerate(projetos, start=1):
+        if progresso is not None:
+            progresso((str(passo - 1), str(len(projetos))))
+        squad_allocator = SquadAllocatorGA(pool, index=indice, encoding='requisitos')
+        for _, row in allocation_df[allocation_df['PROJETO_ID'] == projeto].iterrows():
+            squad_allocator.add_squad_requirement(row['CARGO'], row['SETOR'], row['CLASSE'], row['QUANTIDADE'], row['HORAS'])
+        try:
+            fronteira = squad_allocator.optimize_pareto(population_size=POPULACAO_PARETO, generations=GERACOES_PARETO)
+        except ValueError as erro:
+            logger.warning("%s: %s", projeto, erro)
+            continue
+        fronteiras[projeto] = [
+            {"nomes": ponto["nomes"], "objetivos": ponto["objetivos"]}
+            for ponto in fronteira
+        ]
+    if progresso is not None:
+        progresso((str(len(projetos)), str(max(len(projetos), 1))))
+    return {"roster": versao_roster, "requisitos": chave_requisitos(allocation_df), "fronteiras": fronteiras}
+
+def tabela_pareto(pareto, weights, allocation_df):
+    """
+    Monta a tabela com um ponto da fronteira por projeto, escolhido pelos pesos
+    atuais (sem otimizar de novo).
+
+    Parameters:
+    - allocation_df (pd.DataFrame): Requisitos atuais, comparados com os usados no cálculo.
+
+    Returns:
+    - list or None: Registros da tabela, ou None se o arquivo de alocações ou os
+      requisitos mudaram desde o cálculo da fronteira (os squads guardados não valem mais).
+    """
+    from optaloA3 import select_pareto_point
+
+    if pareto.get("roster") != str(cache_visao_macro.identidade(ARQUIVO_ALOCACOES)):
+        return None
+    if pareto.get("requisitos") != chave_requisitos(allocation_df):
+        return None
+
+    df = gerar_visao_macro()
+    nomes = pd.Index(df['col_nome'].astype(str))
+    partes = []
+    for projeto, fronteira in pareto["fronteiras"].items():
+        escolhido = select_pareto_point(fronteira, weights)
+        if escolhido is None:
+            continue
+        posicoes = nomes.get_indexer(fronteira[escolhido]["nomes"])
+        if (posicoes < 0).any():
+            return None
+        df_opt_aux = df.iloc[posicoes].copy()
+        df_opt_aux['PROJETO_ID'] = projeto
+        df_opt_aux['RECOMENDACAO_PRIORIDADE'] = f'PARETO_{escolhido + 1}_DE_{len(fronteira)}'
+        partes.append(df_opt_aux)
+    if not partes:
+        return []
+    return pd.concat(partes, axis=0, ignore_index=True).to_dict('records')
+
+@app.callback(
+    Output('pareto-store', 'data'),
+    Output('recommendation-store', 'data', allow_duplicate=True),
+    Output('pareto-status', 'children'),
+    Input('pareto-button', 'n_clicks'),
+    State('weight-projects-input', 'value'),
+    State('weight-hours-input', 'value'),
+    State('weight-cost-input', 'value'),
+    State('df-alocacoes-store', 'data'),
+    background=True,
+    running=[
+        (Output('cancelar-button', 'disabled'), False, True),
+        (Output('otimizar-status', 'children'), 'Calculando a fronteira de Pareto...', ''),
+    ],
+    cancel=[Input('cancelar-button', 'n_clicks')],
+    progress=[Output('otimizar-progresso', 'value'), Output('otimizar-progresso', 'max')],
+    prevent_initial_call=True
+)
+def calcular_fronteira_pareto(set_progress, n_clicks, weight_projects, weight_hours, weight_cost, requisitos):
+    # Em segundo plano, como o Otimizar: o NSGA-II de cada projeto não prende o worker web
+    if not n_clicks:
+        raise PreventUpdate
+
+    allocation_df = tabela_requisitos(requisitos)
+    pareto = gerar_fronteiras_pareto(allocation_df, progresso=set_progress)
+    fronteiras = pareto["fronteiras"]
+    pontos = sum(len(fronteira) for fronteira in fronteiras.values())
+    status = f'Fronteira de Pareto: {pontos} squads em {len(fronteiras)} projeto(s). Altere os pesos para escolher outro ponto.'
+    weights = pesos_otimizacao(weight_projects, weight_hours, weight_cost)
+    return pareto, guardar_tabela(tabela_pareto(pareto, weights, allocation_df)), status
+
+@app.callback(
+    Output('recommendation-store', 'data', allow_duplicate=True),
+    Output('pareto-status', 'children', allow_duplicate=True),
+    Input('weight-projects-input', 'value'),
+    Input('weight-hours-input', 'value'),
+    Input('weight-cost-input', 'value'),
+    State('pareto-store', 'data'),
+    State('df-alocacoes-store', 'data'),
+    prevent_initial_call=True
+)
+def escolher_ponto_pareto(weight_projects, weight_hours, weight_cost, pareto, requisitos):
+    # Com a fronteira calculada, mudar os pesos só troca o ponto escolhido
+    if not pareto:
+        raise PreventUpdate
+    registros = tabela_pareto(pareto, pesos_otimizacao(weight_projects, weight_hours, weight_cost), tabela_requisitos(requisitos))
+    if registros is None:
+        return None, 'O arquivo de alocações ou os requisitos mudaram desde o cálculo da fronteira de Pareto; calcule-a de novo.'
+    return guardar_tabela(registros), dash.no_update
+
+@app.callback(
+    Output('recommendation-table', 'data'),
+    Output('recommendation-table', 'page_count'),
+    Output('recomendacao-status', 'children'),
+    Input('recommendation-store', 'data'),
+    Input('recommendation-table', 'page_current'),
+    Input('recommendation-table', 'page_size'),
+    Input('recommendation-table', 'sort_by'),
+    Input('recommendation-table', 'filter_query'),
+)
+def pagina_recomendacao(chave, page_current, page_size, sort_by, filter_query):
+    registros = cache_tabelas.get(chave) if chave else None
+    aviso = ''
+    if chave and registros is None:
+        aviso = 'A tabela de recomendação não está mais disponível no servidor; recalcule com "Otimizar" ou "Fronteira de Pareto".'
+    return (*pagina_tabela(pd.DataFrame(registros or []), page_current, page_size, sort_by, filter_query), aviso)
 
 @app.callback(
     [Output('upload-data', 'children'),
      Output('csv-data-store', 'data'),
-     Output('allocation-table', 'data', allow_duplicate=True)],  # Adicione uma saída para a tabela
+     Output('df-alocacoes-store', 'data'),  # Registros dos requisitos (atualiza a tabela)
+     Output('pareto-store', 'data', allow_duplicate=True),
+     Output('pareto-status', 'children', allow_duplicate=True)],
     Input('upload-data', 'contents'),
     State('upload-data', 'filename'),
+    State('df-alocacoes-store', 'data'),
     prevent_initial_call=True
 )
-def update_uploaded_file(contents, filename):
-    global df_alocacoes
-
+def update_uploaded_file(contents, filename, requisitos):
     data = gerar_visao_macro()
     if contents is None:
         raise PreventUpdate
@@ -670,15 +1099,18 @@ def update_uploaded_file(contents, filename):
 
     # Verifica se as colunas são adequadas
     if set(df.columns) != {'PROJETO_ID', 'CARGO', 'SETOR', 'CLASSE', 'QUANTIDADE', 'HORAS', 'PROJETOS', 'CUSTO'}:
-        return "O arquivo CSV não possui as colunas corretas.", csv_data.to_dict('records'), df_alocacoes.to_dict('records')
+        return "O arquivo CSV não possui as colunas corretas.", csv_data.to_dict('records'), dash.no_update, dash.no_update, dash.no_update
 
     analysis_result = df
-    df_alocacoes = pd.concat([df_alocacoes, df], ignore_index=True)
+    df_alocacoes = pd.concat([tabela_requisitos(requisitos), df], ignore_index=True)
     
-    return "Arquivo CSV carregado com sucesso.", analysis_result.to_dict('records'), df_alocacoes.to_dict('records')
+    # Requisitos novos: a fronteira de Pareto calculada deixa de valer
+    return "Arquivo CSV carregado com sucesso.", analysis_result.to_dict('records'), df_alocacoes.to_dict('records'), None, ''
     
 @app.callback(
-    Output('allocation-table', 'data', allow_duplicate=True),
+    Output('df-alocacoes-store', 'data', allow_duplicate=True),
+    Output('pareto-store', 'data', allow_duplicate=True),
+    Output('pareto-status', 'children', allow_duplicate=True),
     Input('add-allocation-button', 'n_clicks'),
     State('cargo-dropdown', 'value'),
     State('setor-dropdown', 'value'),
@@ -688,15 +1120,16 @@ def update_uploaded_file(contents, filename):
     State('custo-input', 'value'),
     State('nome-projeto-input', 'value'),
     State('quantidade-col-input', 'value'),
+    State('df-alocacoes-store', 'data'),
     prevent_initial_call='initial_duplicate'
 )
-def adicionar_alocacao(n_clicks, cargo, setor, classe, horas, projetos, custo, nome_projeto, quantidade):
+def adicionar_alocacao(n_clicks, cargo, setor, classe, horas, projetos, custo, nome_projeto, quantidade, requisitos):
     if n_clicks is None:
         raise PreventUpdate  # Evita que a callback seja acionada antes do clique no botão
 
     if not cargo or not setor or not classe or horas is None or projetos is None or custo is None or not nome_projeto:
         # Verifica se algum campo não foi preenchido e retorna uma mensagem de erro
-        return dash.no_update
+        return dash.no_update, dash.no_update, dash.no_update
 
     nova_alocacao = {
         'PROJETO_ID': [nome_projeto],
@@ -709,38 +1142,95 @@ def adicionar_alocacao(n_clicks, cargo, setor, classe, horas, projetos, custo, n
         'CUSTO': [custo]
     }
 
-    global df_alocacoes
-    df_alocacoes = pd.concat([df_alocacoes, pd.DataFrame(nova_alocacao)], ignore_index=True)
+    df_alocacoes = pd.concat([tabela_requisitos(requisitos), pd.DataFrame(nova_alocacao)], ignore_index=True)
 
-    return df_alocacoes.to_dict('records')
+    # Requisitos novos: a fronteira de Pareto calculada deixa de valer
+    return df_alocacoes.to_dict('records'), None, ''
+
+@app.callback(
+    Output('allocation-table', 'data'),
+    Output('allocation-table', 'page_count'),
+    Input('df-alocacoes-store', 'data'),
+    Input('allocation-table', 'page_current'),
+    Input('allocation-table', 'page_size'),
+    Input('allocation-table', 'sort_by'),
+    Input('allocation-table', 'filter_query'),
+)
+def pagina_alocacoes(requisitos, page_current, page_size, sort_by, filter_query):
+    return pagina_tabela(tabela_requisitos(requisitos), page_current, page_size, sort_by, filter_query)
 
 @app.callback(
     Output('table2', 'data'),
+    Output('table2', 'page_count'),
+    Input('table2', 'page_current'),
+    Input('table2', 'page_size'),
+    Input('table2', 'sort_by'),
+    Input('table2', 'filter_query'),
+)
+def pagina_visao_macro(page_current, page_size, sort_by, filter_query):
+    # Só a página pedida sai da visão macro em cache
+    return pagina_tabela(gerar_visao_macro(), page_current, page_size, sort_by, filter_query)
+
+@app.callback(
     Output('table2', 'style_data_conditional'),
     Input('heatmap-column', 'value')
 )
 def update_heatmap(selected_column):
+    # As faixas usam o mínimo e o máximo de toda a visão macro, não só da página
     data = gerar_visao_macro()
-    data_styles = []
-
-    max_value = data[selected_column].max()
-    min_value = data[selected_column].min()
+    return estilos_heatmap(data[selected_column].to_numpy(), selected_column)
 
-    for _, row in data.iterrows():
-        cell_value = row[selected_column]
-        color = 'rgb(255, 0, 0)'  # Red
-        if max_value != min_value:
-            color = f'rgb({int(255 * (cell_value - min_value) / (max_value - min_value))}, 0, {int(255 - 255 * (cell_value - min_value) / (max_value - min_value))})'
+def estilos_heatmap(valores, coluna, faixas=FAIXAS_HEATMAP):
+    """
+    Regras style_data_conditional do heatmap, de azul (mínimo) a vermelho (máximo).
 
-        data_styles.append({
-            'if': {'filter_query': f'{{{selected_column}}} eq {cell_value}'},
-            'backgroundColor': color,
-            'color': 'white',
-            'textAlign': 'center',
-            'font-family': 'Verdana'
-        })
+    Com "faixas" os valores são divididos em intervalos iguais entre o mínimo e
+    o máximo e cada faixa vira uma regra >= / <, com a cor do centro da faixa:
+    o número de regras não depende do número de linhas. Com faixas=None cada
+    valor distinto tem a sua regra "eq".
 
-    return data.to_dict('records'), data_styles
+    Returns:
+    - list: Regras de estilo para o DataTable.
+    """
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[~np.isnan(valores)]
+    estilo = {'color': 'white', 'textAlign': 'center', 'font-family': 'Verdana'}
+    if len(valores) == 0:
+        return []
+
+    min_value = valores.min()
+    max_value = valores.max()
+    if max_value == min_value:
+        return [dict({'if': {'filter_query': f'{{{coluna}}} eq {_numero_filtro(min_value)}'}, 'backgroundColor': 'rgb(255, 0, 0)'}, **estilo)]  # Red
+
+    def cores(pontos):
+        fracao = (pontos - min_value) / (max_value - min_value)
+        vermelho = (255 * fracao).astype(int)
+        azul = (255 - 255 * fracao).astype(int)
+        return [f'rgb({r}, 0, {b})' for r, b in zip(vermelho, azul)]
+
+    if faixas is None:
+        distintos = np.unique(valores)
+        return [
+            dict({'if': {'filter_query': f'{{{coluna}}} eq {_numero_filtro(v)}'}, 'backgroundColor': cor}, **estilo)
+            for v, cor in zip(distintos, cores(distintos))
+        ]
+
+    limites = np.linspace(min_value, max_value, faixas + 1)
+    regras = []
+    for i, cor in enumerate(cores((limites[:-1] + limites[1:]) / 2)):
+        condicoes = []
+        if i > 0:
+            condicoes.append(f'{{{coluna}}} >= {_numero_filtro(limites[i])}')
+        if i < faixas - 1:
+            condicoes.append(f'{{{coluna}}} < {_numero_filtro(limites[i + 1])}')
+        regras.append(dict({'if': {'filter_query': ' && '.join(condicoes)}, 'backgroundColor': cor}, **estilo))
+    return regras
+
+def _numero_filtro(valor):
+    # Inteiros sem ".0" na filter_query
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
 
 if __name__ == '__main__':
     app.run_server(debug=False, port=8090)
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Benchmarks de escala: agregação da visão macro, modelo LP (montagem, presolve e
+solve separados), GA e o fluxo completo do botão "Otimizar", este com 10 e
+500 projetos pedidos (--projetos-fluxo). A inicialização
+do app (import de app.py e primeiro layout) é medida em um processo novo e
+tem o seu orçamento nos limites ("inicializacao/..."), definido à mão: o
+--atualizar-limites não o altera, só --orcamento-inicializacao.
+
+Os rosters sintéticos vêm de gerador_roster.py, com as distribuições de
+cargo/classe (grupos) e o bônus de custo por classe. Os tempos são gravados em JSON e
+comparados com os limites de benchmark_limites.json; qualquer medida acima
+do limite é reportada como regressão e o processo termina com código 1. Os
+limites dependem da máquina: regenere-os com --atualizar-limites na máquina
+de referência.
+
+Uso:
+    python benchmark.py                                   # 1k/10k/100k x 10/500 projetos
+    python benchmark.py --colaboradores 1000 --projetos 10
+    python benchmark.py --projetos-fluxo 10 50            # fluxo "Otimizar" com 10 e 50 projetos pedidos
+    python benchmark.py --atualizar-limites               # grava limites = tempo * tolerância (com folga mínima)
+    python benchmark.py --orcamento-inicializacao importar_app=1.5 primeiro_layout=0.7
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from gerador_roster import gravar_alocacoes, perfis
+
+COLABORADORES = [1_000, 10_000, 100_000]
+PROJETOS = [10, 500]
+PROJETOS_FLUXO = [10, 500]
+ARQUIVO_LIMITES = "benchmark_limites.json"
+ARQUIVO_RESULTADOS = "benchmark_resultados.json"
+TOLERANCIA = 2.0
+# Folga mínima (s) para medidas de poucos milissegundos não acusarem ruído como regressão
+FOLGA_MINIMA = 0.05
+# Cenários com orçamento fixo, que --atualizar-limites não recalcula a partir do tempo medido
+ORCAMENTOS_FIXOS = ("inicializacao",)
+
+def gerar_requisitos(n_projetos, seed=0):
+    """
+    Gera a tabela de requisitos (mesmas colunas de allocator.csv): de 1 a 3
+    perfis por projeto, 1 ou 2 colaboradores por perfil.
+    """
+    rng = np.random.default_rng(seed)
+    tabela = perfis()
+    pesos = np.array([p[3] for p in tabela], dtype=float)
+
+    linhas = []
+    for p in range(1, n_projetos + 1):
+        for i in rng.choice(len(tabela), size=rng.integers(1, 4), replace=False, p=pesos / pesos.sum()):
+            cargo, setor, classe, _ = tabela[i]
+            linhas.append([f"PROJETO_{p}", cargo, setor, classe, int(rng.integers(1, 3)), 120, 40, 300])
+    return pd.DataFrame(linhas, columns=['PROJETO_ID', 'CARGO', 'SETOR', 'CLASSE', 'QUANTIDADE', 'HORAS', 'PROJETOS', 'CUSTO'])
+
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+def medir_inicializacao():
+    """
+    Mede, em um processo Python novo, o import de app.py e a montagem do
+    primeiro layout (a visão macro do arquivo de alocações padrão).
+
+    Returns:
+    - dict: Medida -> segundos.
+    """
+    codigo = (
+        "import json, time\n"
+        "inicio = time.perf_counter()\n"
+        "import app\n"
+        "importado = time.perf_counter()\n"
+        "app.construir_layout()\n"
+        "print(json.dumps({'importar_app': importado - inicio, 'primeiro_layout': time.perf_counter() - importado}))\n"
+    )
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=pasta, capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def executar_cenario(n_colaboradores, n_projetos, pasta, projetos_fluxo=PROJETOS_FLUXO, geracoes_ga=20, seed=0):
+    """
+    Mede um cenário (roster de n_colaboradores com histórico em n_projetos).
+
+    O fluxo "Otimizar" é medido uma vez para cada quantidade de projetos
+    pedidos em projetos_fluxo ("optimize_allocation_<n>_projetos"); as
+    quantidades menores usam os primeiros projetos dos mesmos requisitos.
+
+    Returns:
+    - dict: Medida -> segundos.
+    """
+    from visao_macro import carregar_visao_macro
+    from optaloA3 import SquadAllocatorLP, SquadAllocatorGA
+
+    tempos = {}
+    arquivo = os.path.join(pasta, f"alocacoes_{n_colaboradores}_{n_projetos}.csv")
+    tempos["gerar_roster"], _ = cronometrar(gravar_alocacoes, arquivo, n_colaboradores, n_projetos, seed)
+
+    # Agregação da visão macro, completa e em blocos
+    tempos["gerar_visao_macro"], df = cronometrar(carregar_visao_macro, arquivo, usar_snapshot=False)
+    tempos["gerar_visao_macro_blocos"], _ = cronometrar(carregar_visao_macro, arquivo, usar_snapshot=False, chunksize=100_000)
+
+    df_norm = df.copy()
+    for coluna in ['col_hora_alocada', 'col_custo_hora', 'col_number_proj']:
+        df_norm[coluna] = df_norm[coluna] / df_norm[coluna].max()
+
+    requisitos = gerar_requisitos(max(projetos_fluxo), seed)
+    primeiro = requisitos[requisitos['PROJETO_ID'] == requisitos['PROJETO_ID'].iloc[0]]
+
+    # LP: montagem, presolve e solve medidos separadamente
+    allocator = SquadAllocatorLP(df_norm, mode='milp', time_limit=10, mip_gap=0.01)
+    for _, row in primeiro.iterrows():
+        allocator.add_squad_requirement(row['CARGO'], row['SETOR'], row['CLASSE'], row['QUANTIDADE'], row['HORAS'], row['PROJETOS'], row['CUSTO'])
+    inicio = time.perf_counter()
+    modelo = allocator.prepare_model()
+    tempos["lp_build"] = allocator.get_build_stats()["build_time"]
+    tempos["lp_presolve"] = time.perf_counter() - inicio - tempos["lp_build"]
+    tempos["lp_solve"], _ = cronometrar(allocator.solve_model, modelo)
+
+    # GA com a codificação por requisitos
+    ga = SquadAllocatorGA(allocator.pool, index=allocator.index, encoding='requisitos')
+    for _, row in primeiro.iterrows():
+        ga.add_squad_requirement(row['CARGO'], row['SETOR'], row['CLASSE'], row['QUANTIDADE'], row['HORAS'])
+    tempos["ga_optimize"], _ = cronometrar(ga.optimize, generations=geracoes_ga, verbose=False)
+
+    # Fluxo completo do botão "Otimizar" (visão macro já em cache, sem cache de resultados)
+    import app
+    from cache_otimizacao import CacheResultados
+    app.ARQUIVO_ALOCACOES = arquivo
+    app.cache_visao_macro.get(arquivo)
+    for n_pedidos in projetos_fluxo:
+        pedidos = [f"PROJETO_{p}" for p in range(1, n_pedidos + 1)]
+        app.cache_resultados = CacheResultados()
+        pedido = requisitos[requisitos['PROJETO_ID'].isin(pedidos)].reset_index(drop=True)
+        tempos[f"optimize_allocation_{n_pedidos}_projetos"], _ = cronometrar(app.otimizar_alocacao, pedido, 1, 1, 1, 1, 1)
+
+    return tempos
+
+def verificar_limites(resultados, limites):
+    """
+    Compara os tempos com os limites ("cenario/medida" -> segundos).
+
+    Returns:
+    - list: Mensagens das medidas acima do limite.
+    """
+    regressoes = []
+    for cenario, tempos in resultados.items():
+        for medida, segundos in tempos.items():
+            limite = limites.get(f"{cenario}/{medida}")
+            if limite is not None and segundos > limite:
+                regressoes.append(f"{cenario}/{medida}: {segundos:.3f}s > limite {limite:.3f}s")
+    return regressoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de escala do OptAllocator.")
+    parser.add_argument("--colaboradores", type=int, nargs="+", default=COLABORADORES)
+    parser.add_argument("--projetos", type=int, nargs="+", default=PROJETOS, help="Projetos no histórico de alocações.")
+    parser.add_argument("--projetos-fluxo", type=int, nargs="+", default=PROJETOS_FLUXO, help="Projetos pedidos no fluxo completo.")
+    parser.add_argument("--geracoes-ga", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", default=ARQUIVO_RESULTADOS)
+    parser.add_argument("--limites", default=ARQUIVO_LIMITES)
+    parser.add_argument("--atualizar-limites", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--orcamento-inicializacao", nargs="+", default=[], metavar="MEDIDA=SEGUNDOS",
+                        help="Grava o orçamento de inicialização (ex.: importar_app=1.5).")
+    args = parser.parse_args(argv)
+
+    orcamento = {}
+    for item in args.orcamento_inicializacao:
+        medida, _, segundos = item.partition("=")
+        try:
+            orcamento[f"inicializacao/{medida}"] = float(segundos)
+        except ValueError:
+            parser.error(f"--orcamento-inicializacao espera MEDIDA=SEGUNDOS, recebeu {item!r}")
+
+    resultados = {"inicializacao": medir_inicializacao()}
+    print("inicializacao", {medida: round(segundos, 4) for medida, segundos in resultados["inicializacao"].items()})
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_colaboradores in args.colaboradores:
+            for n_projetos in args.projetos:
+                cenario = f"{n_colaboradores}x{n_projetos}"
+                resultados[cenario] = executar_cenario(
+                    n_colaboradores, n_projetos, pasta, args.projetos_fluxo, args.geracoes_ga, args.seed
+                )
+                print(cenario, {medida: round(segundos, 4) for medida, segundos in resultados[cenario].items()})
+
+    with open(args.saida, "w") as arquivo:
+        json.dump({
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "plataforma": platform.platform(),
+            "resultados": resultados,
+        }, arquivo, indent=2)
+
+    limites = {}
+    if os.path.exists(args.limites):
+        with open(args.limites) as arquivo:
+            limites = json.load(arquivo)
+
+    if args.atualizar_limites or orcamento:
+        if args.atualizar_limites:
+            for cenario, tempos in resultados.items():
+                if cenario in ORCAMENTOS_FIXOS:
+                    continue
+                for medida, segundos in tempos.items():
+                    limites[f"{cenario}/{medida}"] = round(max(segundos * args.tolerancia, segundos + FOLGA_MINIMA), 4)
+        limites.update(orcamento)
+        with open(args.limites, "w") as arquivo:
+            json.dump(limites, arquivo, indent=2, sort_keys=True)
+        return 0
+
+    regressoes = verificar_limites(resultados, limites)
+    for regressao in regressoes:
+        print("REGRESSÃO", regressao)
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import pickle
+from collections import OrderedDict
+
+COLUNAS_REQUISITOS = ['PROJETO_ID', 'CARGO', 'SETOR', 'CLASSE', 'QUANTIDADE', 'HORAS', 'PROJETOS', 'CUSTO']
+
+# Versão do formato da chave e do resultado guardado; mude quando o cálculo ou o formato mudarem
+VERSAO_CHAVE = 4
+
+def chave_otimizacao(df_alocacoes, weights, number_recommendations, versao_roster, solver=None):
+    """
+    Gera a chave canônica de uma otimização.
+
+    Combina a versão do formato, as linhas de requisitos (na ordem em que
+    serão processadas), os pesos, o número de recomendações, a versão do
+    roster e as configurações do solver (modo, limite de tempo, gap,
+    trabalhadores), já que o cache em disco sobrevive a mudanças nelas.
+
+    Returns:
+    - str: Hash SHA-256 da combinação.
+    """
+    requisitos = df_alocacoes.reindex(columns=COLUNAS_REQUISITOS).to_dict('split')['data']
+    conteudo = {
+        "versao": VERSAO_CHAVE,
+        "requisitos": requisitos,
+        "pesos": {nome: float(valor) for nome, valor in sorted(weights.items())},
+        "recomendacoes": int(number_recommendations),
+        "roster": versao_roster,
+        "solver": solver or {},
+    }
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True, default=str).encode()).hexdigest()
+
+def chave_requisitos(df_alocacoes):
+    """
+    Gera o hash só das linhas de requisitos (mesmas colunas e ordem de chave_otimizacao).
+
+    Returns:
+    - str: Hash SHA-256 das linhas.
+    """
+    requisitos = df_alocacoes.reindex(columns=COLUNAS_REQUISITOS).to_dict('split')['data']
+    return hashlib.sha256(json.dumps(requisitos, default=str).encode()).hexdigest()
+
+class CacheResultados:
+    """
+    Cache LRU das tabelas de recomendação.
+
+    Limitado por número de entradas e por bytes (tamanho serializado); com
+    "pasta" as entradas também são gravadas em disco (diskcache) e sobrevivem
+    a reinícios e a processos diferentes, limitadas por "max_bytes_disco"
+    (padrão: max_bytes). O cache em disco só é aberto (e a pasta criada) no
+    primeiro uso. Quando a versão do roster muda (verificar_roster) todas as
+    entradas são descartadas.
+    """
+    def __init__(self, max_entradas=128, max_bytes=64 * 1024 * 1024, pasta=None, max_bytes_disco=None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.max_bytes_disco = max_bytes_disco if max_bytes_disco is not None else max_bytes
+        self.entradas = OrderedDict()  # chave -> (resultado, tamanho)
+        self.bytes = 0
+        self.versao_roster = None
+        self.hits = 0
+        self.misses = 0
+        self.pasta = pasta
+        self._disco = None
+
+    @property
+    def disco(self):
+        if self._disco is None and self.pasta is not None:
+            import diskcache
+            self._disco = diskcache.Cache(self.pasta, size_limit=self.max_bytes_disco)
+        return self._disco
+
+    def verificar_roster(self, versao_roster):
+        # Invalida tudo quando o roster muda
+        if self.disco is not None and self.versao_roster is None:
+            self.versao_roster = self.disco.get("__versao_roster__")
+        if versao_roster != self.versao_roster:
+            self.invalidate()
+            self.versao_roster = versao_roster
+            if self.disco is not None:
+                self.disco.set("__versao_roster__", versao_roster)
+
+    def get(self, chave):
+        if chave in self.entradas:
+            self.hits += 1
+            self.entradas.move_to_end(chave)
+            return self.entradas[chave][0]
+
+        if self.disco is not None:
+            resultado = self.disco.get(chave)
+            if resultado is not None:
+                self.hits += 1
+                self._guardar(chave, resultado)
+                return resultado
+
+        self.misses += 1
+        return None
+
+    def put(self, chave, resultado):
+        self._guardar(chave, resultado)
+        if self.disco is not None:
+            self.disco.set(chave, resultado)
+
+    def _guardar(self, chave, resultado):
+        tamanho = len(pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL))
+        if chave in self.entradas:
+            self.bytes -= self.entradas.pop(chave)[1]
+        if tamanho > self.max_bytes:
+            return
+        self.entradas[chave] = (resultado, tamanho)
+        self.bytes += tamanho
+        while len(self.entradas) > self.max_entradas or self.bytes > self.max_bytes:
+            self.bytes -= self.entradas.popitem(last=False)[1][1]
+
+    def invalidate(self):
+        self.entradas.clear()
+        self.bytes = 0
+        if self.disco is not None:
+            self.disco.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entradas": len(self.entradas), "bytes": self.bytes}
@@ -0,0 +1,203 @@
+"""
+Gerador de rosters sintéticos (histórico de alocações) para testes de carga e escala.
+
+Os colaboradores são sorteados com a mistura de cargo/setor/classe de "grupos",
+com custo-hora entre 20 e 110 mais o bônus da classe, e alocados em projetos
+distintos. Tudo é vetorizado com NumPy e o CSV é escrito em blocos de
+colaboradores, formatado direto em bytes, então a memória depende do tamanho
+do bloco e não do total de linhas.
+
+Uso:
+    python gerador_roster.py --colaboradores 5000000 --projetos 500 --saida data_input/carga.csv
+    python gerador_roster.py --colaboradores 1000 --projetos 40 --grupos mistura.json --seed 7
+
+O arquivo de --grupos é um JSON com as chaves "grupos" e "bonus_custo", no
+mesmo formato das tabelas abaixo. Para a mesma seed e o mesmo --bloco a saída
+é sempre a mesma.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from visao_macro import ARQUIVO_ALOCACOES
+
+# Define os grupos
+grupos = {
+    "Grupo 1": {"Cargo": "Cientista de Dados", "Setor": "Cientista", "Classes": {"Junior": 16, "Pleno": 30, "Senior": 8, "Especialista": 4, "Tech Lead": 2}},
+    "Grupo 2": {"Cargo": "Engenheiro de Dados", "Setor": "Engenheiro", "Classes": {"Junior": 25, "Pleno": 35, "Senior": 13, "Especialista": 5, "Tech Lead": 4}},
+    "Grupo 3": {"Cargo": "Engenheiro de Machine Learning", "Setor": "EML", "Classes": {"Junior": 9, "Pleno": 12, "Senior": 3, "Especialista": 2, "Tech Lead": 1}},
+    "Grupo 4": {"Cargo": "Analista de Dados", "Setor": "Analista", "Classes": {"Junior": 8, "Pleno": 15, "Senior": 8, "Especialista": 2, "Tech Lead": 2}}
+}
+
+# Bônus de custo para cada classe
+bonus_custo = {
+    "Junior": 10,
+    "Pleno": 20,
+    "Senior": 30,
+    "Especialista": 40,
+    "Tech Lead": 50
+}
+
+COLUNAS = ["col_matricula", "col_cargo", "col_setor", "col_classe", "pro_number", "horas_alocadas", "col_custo"]
+
+def perfis(grupos=grupos):
+    # (cargo, setor, classe, quantidade) de cada classe de cada grupo
+    return [(d["Cargo"], d["Setor"], classe, quantidade) for d in grupos.values() for classe, quantidade in d["Classes"].items()]
+
+def sortear_bloco(rng, inicio, n_colaboradores, n_projetos, grupos=grupos, bonus_custo=bonus_custo,
+                  min_projetos=1, max_projetos=4):
+    """
+    Sorteia os colaboradores inicio+1 .. inicio+n_colaboradores e suas alocações.
+
+    Cada colaborador recebe de min_projetos a max_projetos projetos distintos:
+    um projeto inicial aleatório seguido de saltos positivos cuja soma não
+    completa a volta.
+
+    Returns:
+    - dict: Arrays por linha de alocação: "matricula" (número), "perfil"
+      (índice em perfis(grupos)), "projeto" (1..n_projetos), "horas" e "custo".
+    """
+    tabela = perfis(grupos)
+    pesos = np.array([p[3] for p in tabela], dtype=float)
+    perfil = rng.choice(len(tabela), size=n_colaboradores, p=pesos / pesos.sum())
+    bonus = np.array([bonus_custo[p[2]] for p in tabela], dtype=np.int64)
+    custo = rng.integers(20, 111, n_colaboradores) + bonus[perfil]
+
+    n_aloc = np.minimum(rng.integers(min_projetos, max_projetos + 1, n_colaboradores), n_projetos)
+    primeira = np.cumsum(n_aloc) - n_aloc
+    linha = np.repeat(np.arange(n_colaboradores), n_aloc)
+    salto_max = max((n_projetos - 1) // max(max_projetos - 1, 1), 1)
+    saltos = rng.integers(1, salto_max + 1, len(linha))
+    saltos[primeira[n_aloc > 0]] = 0
+    acumulado = np.cumsum(saltos)
+    deslocamento = acumulado - np.repeat(acumulado[primeira[n_aloc > 0]], n_aloc[n_aloc > 0])
+    projeto = (rng.integers(0, n_projetos, n_colaboradores)[linha] + deslocamento) % n_projetos
+
+    return {
+        "matricula": inicio + 1 + linha,
+        "perfil": perfil[linha],
+        "projeto": projeto + 1,
+        "horas": rng.integers(10, 41, len(linha)),
+        "custo": custo[linha],
+    }
+
+def gerar_alocacoes(n_colaboradores, n_projetos, seed=0, grupos=grupos, bonus_custo=bonus_custo, **kwargs):
+    """
+    Gera o histórico de alocações em memória, com as colunas do CSV de alocações.
+
+    Returns:
+    - pd.DataFrame: Uma linha por colaborador e projeto.
+    """
+    bloco = sortear_bloco(np.random.default_rng(seed), 0, n_colaboradores, n_projetos, grupos, bonus_custo, **kwargs)
+    tabela = perfis(grupos)
+    textos = [np.array([p[i] for p in tabela], dtype=object)[bloco["perfil"]] for i in range(3)]
+
+    return pd.DataFrame({
+        "col_matricula": np.char.add("MA", bloco["matricula"].astype(str)).astype(object),
+        "col_cargo": textos[0],
+        "col_setor": textos[1],
+        "col_classe": textos[2],
+        "pro_number": np.char.add("PR", bloco["projeto"].astype(str)).astype(object),
+        "horas_alocadas": bloco["horas"],
+        "col_custo": bloco["custo"],
+    }, columns=COLUNAS)
+
+def _campo_inteiro(valores):
+    # Dígitos ASCII alinhados à direita; os zeros à esquerda viram byte 0 (descartado em formatar_csv)
+    valores = np.asarray(valores, dtype=np.int64)
+    largura = len(str(int(valores.max()))) if len(valores) else 1
+    potencias = 10 ** np.arange(largura - 1, -1, -1, dtype=np.int64)
+    digitos = ((valores[:, None] // potencias) % 10 + ord("0")).astype(np.uint8)
+    digitos[:, :-1][valores[:, None] < potencias[:-1]] = 0
+    return digitos
+
+def _texto_csv(texto):
+    # Aspas no padrão do CSV quando o nome tem vírgula, aspas ou quebra de linha
+    texto = str(texto)
+    if any(c in texto for c in ',"\r\n'):
+        return '"' + texto.replace('"', '""') + '"'
+    return texto
+
+def _campo_texto(textos, indices):
+    # Textos de uma tabela pequena (por índice), completados com byte 0 à direita
+    codificados = [t.encode("utf-8") for t in textos]
+    tabela = np.zeros((len(codificados), max(len(t) for t in codificados)), dtype=np.uint8)
+    for i, t in enumerate(codificados):
+        tabela[i, :len(t)] = np.frombuffer(t, dtype=np.uint8)
+    return tabela[indices]
+
+def formatar_csv(campos, n_linhas):
+    """
+    Monta as linhas do CSV em um único buffer de bytes.
+
+    "campos" é a sequência de campos de cada linha: bytes literais (separadores,
+    prefixos) ou matrizes (n_linhas, largura) de bytes com byte 0 como
+    preenchimento, como as de _campo_inteiro e _campo_texto. As linhas são
+    montadas lado a lado numa matriz e o preenchimento sai de uma só vez.
+    """
+    partes = [
+        np.broadcast_to(np.frombuffer(campo, dtype=np.uint8), (n_linhas, len(campo))) if isinstance(campo, bytes) else campo
+        for campo in campos
+    ]
+    linhas = np.hstack(partes)
+    return linhas[linhas != 0].tobytes()
+
+def gravar_alocacoes(filename, n_colaboradores, n_projetos, seed=0, grupos=grupos, bonus_custo=bonus_custo,
+                     bloco=500_000, **kwargs):
+    """
+    Grava o histórico de alocações em CSV, "bloco" colaboradores por vez.
+
+    Returns:
+    - int: Número de linhas de alocação gravadas.
+    """
+    tabela = perfis(grupos)
+    perfil_texto = [",".join(_texto_csv(campo) for campo in p[:3]) for p in tabela]
+
+    linhas = 0
+    with open(filename, "wb") as arquivo:
+        arquivo.write((",".join(COLUNAS) + "\n").encode("utf-8"))
+        for numero, inicio in enumerate(range(0, n_colaboradores, bloco)):
+            rng = np.random.default_rng([seed, numero])
+            dados = sortear_bloco(rng, inicio, min(bloco, n_colaboradores - inicio), n_projetos, grupos, bonus_custo, **kwargs)
+            n_linhas = len(dados["matricula"])
+            arquivo.write(formatar_csv([
+                b"MA", _campo_inteiro(dados["matricula"]), b",",
+                _campo_texto(perfil_texto, dados["perfil"]), b",PR",
+                _campo_inteiro(dados["projeto"]), b",",
+                _campo_inteiro(dados["horas"]), b",",
+                _campo_inteiro(dados["custo"]), b"\n",
+            ], n_linhas))
+            linhas += n_linhas
+    return linhas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um histórico sintético de alocações de colaboradores em projetos.")
+    parser.add_argument("--colaboradores", type=int, required=True)
+    parser.add_argument("--projetos", type=int, required=True)
+    parser.add_argument("--saida", default=ARQUIVO_ALOCACOES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bloco", type=int, default=500_000, help="Colaboradores gerados e gravados por vez.")
+    parser.add_argument("--min-projetos", type=int, default=1)
+    parser.add_argument("--max-projetos", type=int, default=4)
+    parser.add_argument("--grupos", help="JSON com as chaves 'grupos' e 'bonus_custo'.")
+    args = parser.parse_args(argv)
+
+    mistura = {"grupos": grupos, "bonus_custo": bonus_custo}
+    if args.grupos:
+        with open(args.grupos) as arquivo:
+            mistura.update(json.load(arquivo))
+
+    inicio = time.perf_counter()
+    linhas = gravar_alocacoes(
+        args.saida, args.colaboradores, args.projetos, args.seed, mistura["grupos"], mistura["bonus_custo"],
+        bloco=args.bloco, min_projetos=args.min_projetos, max_projetos=args.max_projetos
+    )
+    print(f"{linhas} alocações de {args.colaboradores} colaboradores gravadas em {args.saida} ({time.perf_counter() - inicio:.1f}s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
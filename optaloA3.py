@@ -1,22 +1,561 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
 import numpy as np
 import pandas as pd
 
-from scipy.optimize import linprog
+from scipy import sparse
+from scipy.optimize import linprog, milp, Bounds, LinearConstraint
 
 import random
 from deap import base, creator, tools, algorithms
 
-import numpy as np
-from scipy.optimize import linprog
+# Tipos do DEAP registrados uma única vez (também disponíveis nos processos trabalhadores)
+creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+creator.create("Individual", list, fitness=creator.FitnessMax)
+creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+creator.create("SquadIndividual", list, fitness=creator.FitnessMin)
+creator.create("FitnessPareto", base.Fitness, weights=(-1.0, -1.0, -1.0))
+creator.create("ParetoIndividual", list, fitness=creator.FitnessPareto)
+
+# Objetivos do modo multiobjetivo, na ordem dos valores de fitness
+OBJETIVOS_PARETO = ("projetos", "horas", "custo")
+
+logger = logging.getLogger(__name__)
+
+# Hooks de profiling: hook(evento, nome, segundos, info), chamados ao fim de cada fase ou geração
+_profiling_hooks = []
+
+def add_profiling_hook(hook):
+    _profiling_hooks.append(hook)
+
+def remove_profiling_hook(hook):
+    _profiling_hooks.remove(hook)
+
+@contextmanager
+def profiling(hook=None):
+    """
+    Coleta os eventos de todas as otimizações executadas dentro do bloco.
+
+        with profiling() as eventos:
+            allocator.optimize()
+        # eventos: [{"evento": "phase", "nome": "lp/solve", "segundos": ..., "info": {...}}, ...]
+
+    Um "hook" opcional também recebe cada evento enquanto o bloco executa.
+    """
+    eventos = []
+
+    def coletar(evento, nome, segundos, info):
+        eventos.append({"evento": evento, "nome": nome, "segundos": segundos, "info": info})
+
+    hooks = [coletar] + ([hook] if hook is not None else [])
+    for h in hooks:
+        add_profiling_hook(h)
+    try:
+        yield eventos
+    finally:
+        for h in hooks:
+            remove_profiling_hook(h)
+
+class OptimizationStats:
+    """
+    Tempos por fase, informações do modelo/solver e duração das gerações do GA.
+
+    Cada fase medida com phase() é somada em "phases", registrada no logging
+    (DEBUG) e enviada aos hooks de profiling.
+    """
+    def __init__(self, name="optimization"):
+        self.name = name
+        self.phases = {}  # fase -> segundos acumulados
+        self.counts = {}  # fase -> número de execuções
+        self.info = {}
+        self.generations = []  # segundos de cada geração
+
+    @contextmanager
+    def phase(self, fase, **info):
+        inicio = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_phase(fase, time.perf_counter() - inicio, **info)
+
+    def add_phase(self, fase, segundos, **info):
+        self.phases[fase] = self.phases.get(fase, 0.0) + segundos
+        self.counts[fase] = self.counts.get(fase, 0) + 1
+        logger.debug("%s/%s: %.4fs %s", self.name, fase, segundos, info or "")
+        for hook in list(_profiling_hooks):
+            hook("phase", f"{self.name}/{fase}", segundos, info)
+
+    def add_generation(self, gen, segundos, record):
+        self.generations.append(segundos)
+        for hook in list(_profiling_hooks):
+            hook("generation", f"{self.name}/{gen}", segundos, record)
+
+    def record(self, **info):
+        self.info.update(info)
+
+    def total(self):
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "phases": dict(self.phases),
+            "counts": dict(self.counts),
+            "info": dict(self.info),
+            "generations": list(self.generations),
+            "total": self.total(),
+        }
+
+    def log_summary(self, level=logging.INFO):
+        if logger.isEnabledFor(level):
+            fases = ", ".join(f"{fase}={segundos:.4f}s" for fase, segundos in self.phases.items())
+            resumo = {chave: valor for chave, valor in self.info.items() if not isinstance(valor, list)}
+            logger.log(level, "%s: total=%.4fs %s %s", self.name, self.total(), fases, resumo)
+
+def evolve(population, toolbox, mu, lambda_, cxpb, mutpb, ngen, stats=None, halloffame=None, verbose=__debug__,
+           time_limit=None, stall_generations=None, on_generation=None):
+    """
+    Laço (mu + lambda) equivalente ao algorithms.eaMuPlusLambda, com parada antecipada.
+
+    Para ao completar "ngen" gerações, quando a próxima geração estouraria
+    "time_limit" segundos (estimada pela duração da última) ou quando o
+    melhor fitness não melhora por "stall_generations" gerações. O critério
+    de estagnação usa o hall da fama, que é criado se não for informado.
+    "on_generation", se informado, recebe (geração, segundos, registro do logbook)
+    ao fim de cada geração.
+
+    Returns:
+    - tuple: (população, logbook, motivo da parada: 'generations', 'time_limit' ou 'stall').
+    """
+    inicio = time.perf_counter()
+    if halloffame is None and stall_generations is not None:
+        halloffame = tools.HallOfFame(1)
+
+    logbook = tools.Logbook()
+    logbook.header = ['gen', 'nevals'] + (stats.fields if stats else [])
+
+    def avaliar(individuos):
+        invalidos = [ind for ind in individuos if not ind.fitness.valid]
+        for ind, fit in zip(invalidos, toolbox.map(toolbox.evaluate, invalidos)):
+            ind.fitness.values = fit
+        return len(invalidos)
+
+    nevals = avaliar(population)
+    if halloffame is not None:
+        halloffame.update(population)
+    record = stats.compile(population) if stats else {}
+    logbook.record(gen=0, nevals=nevals, elapsed=time.perf_counter() - inicio, **record)
+    if verbose:
+        print(logbook.stream)
+
+    melhor = halloffame[0].fitness.wvalues if halloffame else None
+    sem_melhora = 0
+    motivo = 'generations'
+    for gen in range(1, ngen + 1):
+        inicio_geracao = time.perf_counter()
+
+        offspring = algorithms.varOr(population, toolbox, lambda_, cxpb, mutpb)
+        nevals = avaliar(offspring)
+        if halloffame is not None:
+            halloffame.update(offspring)
+        population[:] = toolbox.select(population + offspring, mu)
+
+        agora = time.perf_counter()
+        record = stats.compile(population) if stats else {}
+        logbook.record(gen=gen, nevals=nevals, elapsed=agora - inicio, **record)
+        if verbose:
+            print(logbook.stream)
+        if on_generation is not None:
+            on_generation(gen, agora - inicio_geracao, logbook[-1])
+
+        if halloffame:
+            if halloffame[0].fitness.wvalues > melhor:
+                melhor = halloffame[0].fitness.wvalues
+                sem_melhora = 0
+            else:
+                sem_melhora += 1
+        if gen < ngen:
+            if stall_generations is not None and sem_melhora >= stall_generations:
+                motivo = 'stall'
+                break
+            if time_limit is not None and (agora - inicio) + (agora - inicio_geracao) > time_limit:
+                motivo = 'time_limit'
+                break
+
+    return population, logbook, motivo
+
+def select_pareto_point(front, weights):
+    """
+    Escolhe o ponto da fronteira de Pareto que minimiza a soma ponderada dos
+    objetivos, normalizados para [0, 1] dentro da própria fronteira.
+
+    Parameters:
+    - front (list): Pontos como os de SquadAllocatorGA.optimize_pareto (com "objetivos").
+    - weights (dict): Pesos minimize_projects, minimize_hours e minimize_cost.
+
+    Returns:
+    - int: Índice do ponto escolhido (ou None se a fronteira estiver vazia).
+    """
+    if not front:
+        return None
+    valores = np.array([[ponto["objetivos"][nome] for nome in OBJETIVOS_PARETO] for ponto in front], dtype=float)
+    amplitude = valores.max(axis=0) - valores.min(axis=0)
+    normalizados = (valores - valores.min(axis=0)) / np.where(amplitude > 0, amplitude, 1.0)
+    pesos = np.array([weights["minimize_projects"], weights["minimize_hours"], weights["minimize_cost"]], dtype=float)
+    return int(np.argmin(normalizados @ pesos))
+
+def _concat(partes, dtype):
+    # Concatena os blocos de cada requisito, tratando o caso sem requisitos
+    if not partes:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(partes).astype(dtype, copy=False)
+
+def _somar_requisitos(requisitos, campos):
+    # Requisitos repetidos (mesmos "campos") viram uma única linha de quantidade com a soma,
+    # como em SquadAllocatorGA.requirement_groups: duas linhas de 1 pedem 2 colaboradores
+    linhas, somados, linha_req = {}, [], []
+    for req in requisitos:
+        chave = tuple(req[campo] for campo in campos)
+        if chave not in linhas:
+            linhas[chave] = len(somados)
+            somados.append(dict(req, quantidade=0))
+        somados[linhas[chave]]['quantidade'] += req['quantidade']
+        linha_req.append(linhas[chave])
+    return linha_req, somados
+
+def _individual_rows(req, indices, offset):
+    # Linhas de projetos, custo e horas máximas para cada candidato do requisito
+    k = len(indices)
+    rows = offset + np.arange(3 * k)
+    cols = np.repeat(indices, 3)
+    data = np.tile([1.0, req['custo_maximo'], req['horas_maximas']], k)
+    b = np.tile([req['projetos_maximos'], req['custo_maximo'], req['horas_maximas']], k)
+    return rows, cols, data, b
+
+def _cost_vector(weights, projetos, horas_disponiveis, custo_hora):
+    return (
+        weights["minimize_projects"] * projetos +
+        weights["minimize_hours"] * horas_disponiveis +
+        weights["minimize_cost"] * custo_hora
+    )
+
+def presolve(c, A_eq, b_eq, A_ub, b_ub, lb, ub):
+    """
+    Reduz o modelo antes do solver.
+
+    Linhas de desigualdade com uma única variável viram limites, colunas que não
+    aparecem em nenhuma restrição são fixadas no melhor limite e linhas de
+    igualdade que não podem ser atendidas são reportadas em "infeasible_eq".
+
+    Returns:
+    - dict: Modelo reduzido, mapeamento das colunas e estatísticas da redução.
+    """
+    A_eq = sparse.csr_matrix(A_eq)
+    A_ub = sparse.csr_matrix(A_ub)
+    lb = np.array(lb, dtype=float)
+    ub = np.array(ub, dtype=float)
+    n_eq, n = A_eq.shape
+    n_ub = A_ub.shape[0]
+
+    # Linhas singulares de A_ub: a * x_j <= b vira limite de x_j
+    nnz_linha = np.diff(A_ub.indptr)
+    singular = np.flatnonzero(nnz_linha == 1)
+    cols = A_ub.indices[A_ub.indptr[singular]]
+    a = A_ub.data[A_ub.indptr[singular]]
+    limite = b_ub[singular] / np.where(a == 0, 1, a)
+    np.minimum.at(ub, cols[a > 0], limite[a > 0])
+    np.maximum.at(lb, cols[a < 0], limite[a < 0])
+
+    # Linhas vazias (ou singulares com coeficiente zero) só exigem b >= 0
+    vazia = (nnz_linha == 0)
+    vazia[singular[a == 0]] = True
+    infeasible_ub = np.flatnonzero(vazia & (b_ub < 0))
+
+    manter_ub = (nnz_linha > 1)
+    A_ub = A_ub[manter_ub]
+    b_ub = b_ub[manter_ub]
+
+    # Colunas sem nenhuma restrição são fixadas no limite que minimiza o custo
+    usada = (np.diff(A_eq.tocsc().indptr) > 0) | (np.diff(A_ub.tocsc().indptr) > 0)
+    x_fixo = np.where(c >= 0, lb, ub)
+    fixa = (~usada & np.isfinite(x_fixo)) | (lb == ub)
+    x_fixo = np.where(fixa, np.where(lb == ub, lb, x_fixo), 0.0)
+
+    # Substitui as colunas fixas no lado direito
+    b_eq = b_eq - A_eq @ x_fixo
+    b_ub = b_ub - A_ub @ x_fixo
+    colunas = np.flatnonzero(~fixa)
+    A_eq = A_eq[:, colunas]
+    A_ub = A_ub[:, colunas]
+    lb_r, ub_r = lb[colunas], ub[colunas]
+
+    # Igualdades impossíveis: o intervalo atingível da linha não contém b
+    pos = A_eq.maximum(0)
+    neg = A_eq.minimum(0)
+    ub_finito = np.where(np.isfinite(ub_r), ub_r, 0)
+    lb_finito = np.where(np.isfinite(lb_r), lb_r, 0)
+    maximo = pos @ ub_finito + neg @ lb_finito
+    minimo = pos @ lb_finito + neg @ ub_finito
+    ilimitado_max = (pos @ ~np.isfinite(ub_r)) + (-neg @ ~np.isfinite(lb_r)) > 0
+    ilimitado_min = (pos @ ~np.isfinite(lb_r)) + (-neg @ ~np.isfinite(ub_r)) > 0
+    tol = 1e-9
+    infeasible_eq = np.flatnonzero(
+        (~ilimitado_max & (maximo < b_eq - tol)) | (~ilimitado_min & (minimo > b_eq + tol))
+    )
+
+    stats = {
+        "rows_before": n_eq + n_ub,
+        "rows_after": A_eq.shape[0] + A_ub.shape[0],
+        "cols_before": n,
+        "cols_after": len(colunas),
+        "bounds_folded": len(singular),
+        "cols_fixed": int(fixa.sum()),
+    }
+
+    return {
+        "c": c[colunas],
+        "A_eq": A_eq,
+        "b_eq": b_eq,
+        "A_ub": A_ub,
+        "b_ub": b_ub,
+        "bounds": np.column_stack((lb_r, ub_r)),
+        "columns": colunas,
+        "x_fixed": x_fixo,
+        "infeasible": bool(len(infeasible_eq) or len(infeasible_ub) or np.any(lb > ub)),
+        "infeasible_eq": infeasible_eq,
+        "stats": stats,
+    }
+
+class CandidatePool:
+    """
+    Pool de candidatos em arrays numpy contíguos.
+
+    Cargo, setor e classe ficam como códigos inteiros (com as categorias ao
+    lado) e "position" mapeia a matrícula para a posição no pool, para que os
+    alocadores trabalhem só com posições.
+    """
+    CATEGORICAL = ["col_cargo", "col_setor", "col_classe"]
+
+    def __init__(self, nomes, horas, custos, projetos, codes, categories):
+        self.nomes = np.asarray(nomes, dtype=object)
+        self.horas = np.ascontiguousarray(horas, dtype=float)
+        self.custos = np.ascontiguousarray(custos, dtype=float)
+        self.projetos = np.ascontiguousarray(projetos, dtype=float)
+        self.codes = codes  # coluna -> códigos inteiros (-1 para ausente)
+        self.categories = categories  # coluna -> array de categorias
+        self.position = {nome: i for i, nome in enumerate(self.nomes)}
+
+    @classmethod
+    def from_dataframe(cls, df):
+        codes, categories = {}, {}
+        for coluna in cls.CATEGORICAL:
+            serie = df[coluna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                codes[coluna] = serie.cat.codes.to_numpy().astype(np.int32)
+                categories[coluna] = np.asarray(serie.cat.categories, dtype=object)
+            else:
+                codigos, categorias = pd.factorize(serie)
+                codes[coluna] = codigos.astype(np.int32)
+                categories[coluna] = np.asarray(categorias, dtype=object)
+        return cls(
+            df["col_nome"].to_numpy(), df["col_hora_alocada"].to_numpy(), df["col_custo_hora"].to_numpy(),
+            df["col_number_proj"].to_numpy(), codes, categories
+        )
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def decode(self, coluna, positions=None):
+        codigos = self.codes[coluna] if positions is None else self.codes[coluna][positions]
+        return self.categories[coluna][codigos]
+
+    def code_of(self, coluna, valor):
+        # Código inteiro da categoria, ou -2 se ela não existe no pool
+        encontrados = np.flatnonzero(self.categories[coluna] == valor)
+        return int(encontrados[0]) if len(encontrados) else -2
+
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=int)
+        return CandidatePool(
+            self.nomes[positions], self.horas[positions], self.custos[positions], self.projetos[positions],
+            {coluna: codigos[positions] for coluna, codigos in self.codes.items()}, dict(self.categories)
+        )
+
+    def to_dataframe(self, positions=None):
+        if positions is None:
+            positions = np.arange(len(self))
+        return pd.DataFrame({
+            "col_nome": self.nomes[positions],
+            "col_hora_alocada": self.horas[positions],
+            "col_custo_hora": self.custos[positions],
+            "col_number_proj": self.projetos[positions],
+            **{coluna: self.decode(coluna, positions) for coluna in self.CATEGORICAL},
+        })
+
+def as_pool(df):
+    # Aceita tanto um DataFrame da visão macro quanto um CandidatePool
+    return df if isinstance(df, CandidatePool) else CandidatePool.from_dataframe(df)
+
+class RoleGroupIndex:
+    """
+    Índice (cargo, setor, classe) -> posições dos colaboradores no pool.
+
+    É montado uma vez por pool de candidatos; remove() atualiza apenas os
+    grupos afetados quando colaboradores saem entre rodadas de recomendação.
+    """
+    def __init__(self, df=None):
+        self.groups = {}
+        self.group_of = np.empty(0, dtype=int)
+        self.keys = []
+        if df is not None:
+            pool = as_pool(df)
+            cargo, setor, classe = (pool.codes[coluna].astype(np.int64) for coluna in CandidatePool.CATEGORICAL)
+            n_setor = len(pool.categories["col_setor"])
+            n_classe = len(pool.categories["col_classe"])
+
+            # Um código inteiro por combinação (cargo, setor, classe); ausentes ficam fora
+            valido = (cargo >= 0) & (setor >= 0) & (classe >= 0)
+            combinado = np.where(valido, (cargo * n_setor + setor) * n_classe + classe, -1)
+            posicoes = np.flatnonzero(valido)
+            unicos, inverso = np.unique(combinado[posicoes], return_inverse=True)
+            ordem = np.argsort(inverso, kind="stable")
+            grupos = np.split(posicoes[ordem], np.cumsum(np.bincount(inverso))[:-1]) if len(unicos) else []
+
+            self.group_of = np.full(len(pool), -1)
+            for g, membros in enumerate(grupos):
+                i = membros[0]
+                chave = tuple(pool.categories[coluna][pool.codes[coluna][i]] for coluna in CandidatePool.CATEGORICAL)
+                self.keys.append(chave)
+                self.groups[chave] = membros
+                self.group_of[membros] = g
+
+    def get(self, cargo, setor, classe):
+        return self.groups.get((cargo, setor, classe), np.empty(0, dtype=int))
+
+    def by_cargo(self, cargo):
+        partes = [posicoes for chave, posicoes in self.groups.items() if chave[0] == cargo]
+        return np.sort(_concat(partes, int))
+
+    def remove(self, positions):
+        positions = np.asarray(positions, dtype=int)
+        afetados = np.unique(self.group_of[positions])
+        for g in afetados[afetados >= 0]:
+            chave = self.keys[g]
+            self.groups[chave] = np.setdiff1d(self.groups[chave], positions, assume_unique=True)
+        self.group_of[positions] = -1
+
+    def copy(self):
+        novo = RoleGroupIndex()
+        novo.groups = dict(self.groups)
+        novo.group_of = self.group_of.copy()
+        novo.keys = list(self.keys)
+        return novo
+
+    def __len__(self):
+        return int(np.count_nonzero(self.group_of >= 0))
+
+def _solve_milp(modelo, time_limit=None, mip_gap=None, node_limit=None):
+    # Resolve o modelo reduzido com variáveis inteiras; com limite de tempo ou de
+    # nós o HiGHS devolve a melhor solução incumbente encontrada até ali
+    constraints = []
+    if modelo["A_eq"].shape[0]:
+        constraints.append(LinearConstraint(modelo["A_eq"], modelo["b_eq"], modelo["b_eq"]))
+    if modelo["A_ub"].shape[0]:
+        constraints.append(LinearConstraint(modelo["A_ub"], -np.inf, modelo["b_ub"]))
+
+    options = {}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+    if mip_gap is not None:
+        options["mip_rel_gap"] = mip_gap
+    if node_limit is not None:
+        options["node_limit"] = node_limit
+
+    return milp(
+        modelo["c"], integrality=np.ones(len(modelo["c"])),
+        bounds=Bounds(modelo["bounds"][:, 0], modelo["bounds"][:, 1]),
+        constraints=constraints, options=options
+    )
+
+def _presolve_requisitos(stats, requisitos, build_stats, c, A_eq, b_eq, A_ub, b_ub, lb, ub):
+    """
+    Presolve comum aos alocadores: reduz o modelo, registra as estatísticas em
+    "stats" e levanta ValueError se algum requisito (linha de A_eq) ou o modelo
+    for inviável.
+    """
+    with stats.phase("presolve"):
+        modelo = presolve(c, A_eq, b_eq, A_ub, b_ub, lb, ub)
+    stats.record(model=build_stats, presolve=modelo["stats"])
+
+    for r in modelo["infeasible_eq"]:
+        req = requisitos[r]
+        no_projeto = f" no projeto {req['projeto']}" if "projeto" in req else ""
+        raise ValueError(
+            f"Requisito inviável{no_projeto}: {req['cargo']} / {req['setor']} / {req['classe']} "
+            f"pede {req['quantidade']} colaborador(es) e o grupo não comporta essa quantidade."
+        )
+    if modelo["infeasible"]:
+        raise ValueError("Modelo inviável detectado no presolve.")
+
+    return modelo
+
+def _resolver_reduzido(modelo, stats, mode='milp', method='highs', time_limit=None, mip_gap=None, node_limit=None):
+    """
+    Resolve o modelo reduzido (linprog ou milp) e devolve a solução completa,
+    com as colunas fixadas no presolve, e o solve_info.
+
+    Returns:
+    - tuple: (x, solve_info). Levanta ValueError se o solver não devolver solução.
+    """
+    x = modelo["x_fixed"].copy()
+    solve_info = {"mode": mode, "status": 0, "message": "Resolvido no presolve.", "gap": 0.0}
+    if len(modelo["columns"]):
+        with stats.phase("solve", mode=mode, columns=len(modelo["columns"])):
+            if mode == 'milp':
+                result = _solve_milp(modelo, time_limit, mip_gap, node_limit)
+                gap = getattr(result, "mip_gap", None)
+            else:
+                result = linprog(
+                    modelo["c"], A_eq=modelo["A_eq"], b_eq=modelo["b_eq"], A_ub=modelo["A_ub"], b_ub=modelo["b_ub"],
+                    bounds=modelo["bounds"], method=method
+                )
+                gap = None
+        solve_info = {
+            "mode": mode, "status": result.status, "message": result.message, "gap": gap,
+            "objective": getattr(result, "fun", None),
+            "iterations": getattr(result, "nit", None),
+            "nodes": getattr(result, "mip_node_count", None),
+        }
+        if result.x is None:
+            raise ValueError(f"Nenhuma alocação encontrada: {result.message}")
+        x[modelo["columns"]] = np.round(result.x) if mode == 'milp' else result.x
+    stats.record(solver=solve_info)
+    return x, solve_info
 
 class SquadAllocatorLP:
-    def __init__(self, df, method='highs'):
+    def __init__(self, df, method='highs', mode='lp', time_limit=None, mip_gap=None, node_limit=None, index=None):
         self.df = df
+        self.pool = as_pool(df)
+        self.index = index if index is not None else RoleGroupIndex(self.pool)
         self.squad_requirements = []
         self.allocation = []
+        self.allocation_positions = np.empty(0, dtype=int)
         self.weights = {"minimize_projects": 1.0, "minimize_hours": 1.0, "minimize_cost": 1.0}
         self.hire_required = {}  # Dicionário para indicar se a contratação é necessária para cada cargo
         self.method = method
+        self.mode = mode  # 'lp' (relaxação) ou 'milp' (variáveis binárias)
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+        self.node_limit = node_limit
+        self.build_stats = {}
+        self.presolve_stats = {}
+        self.solve_info = {}
+        self.sweep_stats = {}
+        self.requirement_rows = []  # Requisitos somados por grupo, um por linha de A_eq
+        self.stats = OptimizationStats("lp")
 
     def add_squad_requirement(self, cargo, setor, classe, quantidade, horas_maximas, projetos_maximos, custo_maximo):
         self.squad_requirements.append({"cargo": cargo, "setor": setor, "classe": classe, "quantidade": quantidade, "horas_maximas": horas_maximas, "projetos_maximos": projetos_maximos, "custo_maximo": custo_maximo})
@@ -24,94 +563,563 @@ class SquadAllocatorLP:
     def set_weights(self, weights):
         self.weights = weights
 
-    def optimize(self):
-        # Converter os dados do DataFrame em matrizes
-        projetos = self.df["col_number_proj"].values
-        horas_disponiveis = self.df["col_hora_alocada"].values
-        custo_hora = self.df["col_custo_hora"].values
+    def build_model(self):
+        n = len(self.pool)
 
-        # Inicializar A_eq como uma matriz vazia
-        A_eq = np.empty((0, len(self.df)))
+        inicio = time.perf_counter()
 
-        # Vetor b_eq
+        # Triplas (linha, coluna, valor) das restrições de igualdade
+        eq_rows, eq_cols, eq_data = [], [], []
         b_eq = []
 
-        # Inicializar A_ub como uma matriz vazia
-        A_ub = np.empty((0, len(self.df)))
-
-        # Vetor b_ub
+        # Triplas (linha, coluna, valor) das restrições de desigualdade
+        ub_rows, ub_cols, ub_data = [], [], []
         b_ub = []
+        n_ub = 0
 
-        for req in self.squad_requirements:
-            indices = [
-                j
-                for j, row in enumerate(self.df["col_cargo"])
-                if row == req['cargo'] and
-                   self.df["col_setor"].values[j] == req['setor'] and
-                   self.df["col_classe"].values[j] == req['classe']
-            ]
-            # Adicione uma nova linha de restrição
-            A_new = np.zeros((1, len(self.df)))
-            A_new[0, indices] = 1
-            A_eq = np.vstack((A_eq, A_new))
-            b_eq.append(req['quantidade'])
-
-            hire_required = False  # Variável para indicar se contratação é necessária para este cargo
-
-            for i in indices:
-                # Adicionar restrição de número máximo de projetos individual
-                A_projeto_max_individual = np.zeros((1, len(self.df)))
-                A_projeto_max_individual[0, i] = 1
-                A_ub = np.vstack((A_ub, A_projeto_max_individual))
-                b_ub.append(req['projetos_maximos'])
-
-                # Adicionar restrição de custo máximo individual
-                A_custo_max_individual = np.zeros((1, len(self.df)))
-                A_custo_max_individual[0, i] = req['custo_maximo']
-                A_ub = np.vstack((A_ub, A_custo_max_individual))
-                b_ub.append(req['custo_maximo'])
-
-                # Adicionar restrição de horas máximas individual
-                A_horas_max_individual = np.zeros((1, len(self.df)))
-                A_horas_max_individual[0, i] = req['horas_maximas']
-                A_ub = np.vstack((A_ub, A_horas_max_individual))
-                b_ub.append(req['horas_maximas'])
-
-                # Verificar se a contratação é necessária para este cargo
-                if i not in self.allocation:
-                    hire_required = True
-
-            self.hire_required[req['cargo']] = hire_required
-
-        # Converter b_eq para um array NumPy
-        b_eq = np.array(b_eq)
-        b_ub = np.array(b_ub)
+        alocados = set(self.allocation)
+
+        # Candidatos de cada grupo direto do índice
+        with self.stats.phase("match"):
+            candidatos = [self.index.get(req['cargo'], req['setor'], req['classe']) for req in self.squad_requirements]
+
+        fim_match = time.perf_counter()
+        linha_req, self.requirement_rows = _somar_requisitos(self.squad_requirements, ('cargo', 'setor', 'classe'))
+        for req, indices, r in zip(self.squad_requirements, candidatos, linha_req):
+            k = len(indices)
+
+            # Restrição de quantidade do grupo (uma por grupo, com a soma dos requisitos repetidos)
+            if r == len(b_eq):
+                eq_rows.append(np.full(k, r))
+                eq_cols.append(indices)
+                eq_data.append(np.ones(k))
+                b_eq.append(self.requirement_rows[r]['quantidade'])
+
+            # Restrições individuais de projetos, custo e horas máximas (três linhas por candidato)
+            rows, cols, data, b = _individual_rows(req, indices, n_ub)
+            ub_rows.append(rows)
+            ub_cols.append(cols)
+            ub_data.append(data)
+            b_ub.append(b)
+            n_ub += 3 * k
+
+            # Verificar se a contratação é necessária para este cargo
+            self.hire_required[req['cargo']] = any(i not in alocados for i in indices)
+
+        A_eq = sparse.coo_matrix(
+            (_concat(eq_data, float), (_concat(eq_rows, int), _concat(eq_cols, int))),
+            shape=(len(self.requirement_rows), n)
+        ).tocsr()
+        A_ub = sparse.coo_matrix(
+            (_concat(ub_data, float), (_concat(ub_rows, int), _concat(ub_cols, int))),
+            shape=(n_ub, n)
+        ).tocsr()
+        b_eq = np.array(b_eq, dtype=float)
+        b_ub = _concat(b_ub, float)
+        self.stats.add_phase("build", time.perf_counter() - fim_match)
+
+        self.build_stats = {
+            "build_time": time.perf_counter() - inicio,
+            "n_variables": n,
+            "n_eq": A_eq.shape[0],
+            "n_ub": A_ub.shape[0],
+            "nnz": A_eq.nnz + A_ub.nnz,
+        }
+
+        return A_eq, b_eq, A_ub, b_ub
+
+    def prepare_model(self):
+        self.stats = OptimizationStats("lp")
+
+        # Montar as restrições em formato esparso
+        A_eq, b_eq, A_ub, b_ub = self.build_model()
 
         # Definir os limites das variáveis
-        bounds = [(0, 1)] * len(self.df)
+        n = len(self.pool)
+        lb = np.zeros(n)
+        ub = np.ones(n)
 
         # Multiplicar os pesos pelas variáveis
-        c = (
-            self.weights["minimize_projects"] * projetos +
-            self.weights["minimize_hours"] * horas_disponiveis +
-            self.weights["minimize_cost"] * custo_hora
-        )
+        c = _cost_vector(self.weights, self.pool.projetos, self.pool.horas, self.pool.custos)
+
+        # Reduzir o modelo antes de chamar o solver
+        return self._presolve(c, A_eq, b_eq, A_ub, b_ub, lb, ub)
+
+    def _presolve(self, c, A_eq, b_eq, A_ub, b_ub, lb, ub):
+        modelo = _presolve_requisitos(self.stats, self.requirement_rows, self.build_stats, c, A_eq, b_eq, A_ub, b_ub, lb, ub)
+        self.presolve_stats = modelo["stats"]
+        return modelo
+
+    def optimize_weights(self, weights_batch):
+        """
+        Resolve o mesmo squad para uma lista de pesos montando as restrições uma vez.
+
+        As restrições não dependem dos pesos: só o vetor de custo muda. O
+        presolve só é refeito quando muda o sinal dos custos (que decide onde as
+        colunas livres são fixadas) e pesos proporcionais, que têm o mesmo
+        ótimo, são resolvidos uma única vez. Os solvers HiGHS do scipy não
+        aceitam solução inicial, então cada objetivo distinto é um solve.
+
+        Parameters:
+        - weights_batch (list): Dicionários de pesos, como em set_weights.
+
+        Returns:
+        - list: Para cada pesos, na mesma ordem, um dicionário com "weights",
+          "allocation", "positions" e "solve_info".
+        """
+        inicio = time.perf_counter()
+        self.stats = OptimizationStats("lp")
+        A_eq, b_eq, A_ub, b_ub = self.build_model()
+        n = len(self.pool)
+        lb = np.zeros(n)
+        ub = np.ones(n)
+
+        modelos = {}  # sinais do custo -> modelo reduzido
+        resolvidos = {}  # pesos normalizados -> resultado
+        resultados = []
+        for weights in weights_batch:
+            pesos = np.array([weights["minimize_projects"], weights["minimize_hours"], weights["minimize_cost"]], dtype=float)
+            total = pesos.sum()
+            chave = tuple(np.round(pesos / total, 12)) if total > 0 else tuple(pesos)
+
+            if chave not in resolvidos:
+                c = _cost_vector(weights, self.pool.projetos, self.pool.horas, self.pool.custos)
+                sinais = (c >= 0).tobytes()
+                if sinais not in modelos:
+                    modelos[sinais] = self._presolve(c, A_eq, b_eq, A_ub, b_ub, lb, ub)
+                modelo = dict(modelos[sinais], c=c[modelos[sinais]["columns"]])
+
+                self.solve_model(modelo)
+                resolvidos[chave] = {
+                    "allocation": self.allocation,
+                    "positions": self.allocation_positions,
+                    "solve_info": self.solve_info,
+                }
+            resultados.append(dict(resolvidos[chave], weights=weights))
 
+        self.sweep_stats = {
+            "weights": len(resultados),
+            "solves": len(resolvidos),
+            "presolves": len(modelos),
+            "time": time.perf_counter() - inicio,
+        }
+        self.stats.record(sweep=self.sweep_stats)
+        self.stats.log_summary()
+        return resultados
+
+    def solve_model(self, modelo):
         # Resolver o problema de otimização
-        result = linprog(c, A_eq=A_eq, b_eq=b_eq, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method=self.method)
+        x, self.solve_info = _resolver_reduzido(
+            modelo, self.stats, self.mode, self.method, self.time_limit, self.mip_gap, self.node_limit
+        )
 
         # Obter o resultado da alocação
-        self.allocation = [(self.df["col_nome"].values[i], result.x[i]) for i in range(len(result.x)) if result.x[i] > 0]
+        with self.stats.phase("extract"):
+            self.allocation_positions = np.flatnonzero(x > 0)
+            self.allocation = [(self.pool.nomes[i], x[i]) for i in self.allocation_positions]
+        return x
+
+    def optimize(self):
+        self.solve_model(self.prepare_model())
+        self.stats.log_summary()
+
+    def iter_alternatives(self, k):
+        """
+        Gera até k squads alternativos montando o modelo uma única vez.
+
+        A cada rodada os colaboradores escolhidos têm o limite superior zerado e
+        o mesmo modelo reduzido é resolvido de novo. Se uma rodada fica inviável
+        o ValueError é propagado e a geração termina.
+        """
+        modelo = self.prepare_model()
+        posicao = np.full(len(self.pool), -1)
+        posicao[modelo["columns"]] = np.arange(len(modelo["columns"]))
+        modelo["bounds"] = modelo["bounds"].copy()
+
+        for _ in range(k):
+            x = self.solve_model(modelo)
+            yield self.allocation
+
+            # Remove os escolhidos das próximas rodadas
+            escolhidos = np.flatnonzero(x > 0)
+            modelo["bounds"][posicao[escolhidos[posicao[escolhidos] >= 0]], 1] = 0
+            modelo["x_fixed"][escolhidos[posicao[escolhidos] < 0]] = 0
+
+    def optimize_alternatives(self, k):
+        alternativas = []
+        try:
+            for allocation in self.iter_alternatives(k):
+                alternativas.append(allocation)
+        except ValueError:
+            pass
+        return alternativas
 
     def get_allocation_results(self):
         return self.allocation
 
+    def get_allocation_positions(self):
+        return self.allocation_positions
+
+    def get_build_stats(self):
+        return self.build_stats
+
+    def get_presolve_stats(self):
+        return self.presolve_stats
+
+    def get_solve_info(self):
+        return self.solve_info
+
+    def get_sweep_stats(self):
+        return self.sweep_stats
+
+    def get_stats(self):
+        return self.stats
+
     def is_hire_required(self, cargo):
         return self.hire_required.get(cargo, False)
 
+def solve_project(pool, requisitos, weights, k=1, index=None, **solver_kwargs):
+    """
+    Resolve as k rodadas de recomendação de um projeto com SquadAllocatorLP.
+
+    "requisitos" é a lista de argumentos de add_squad_requirement. Retorna uma
+    lista de (posições escolhidas, solve_info) e para na primeira rodada inviável.
+    """
+    allocator = SquadAllocatorLP(pool, index=index.copy() if index is not None else None, **solver_kwargs)
+    allocator.set_weights(weights)
+    for requisito in requisitos:
+        allocator.add_squad_requirement(*requisito)
+
+    rodadas = []
+    try:
+        for _ in allocator.iter_alternatives(k):
+            rodadas.append((allocator.get_allocation_positions(), allocator.get_solve_info()))
+    except ValueError:
+        pass
+    return rodadas
+
+def solve_project_without_conflicts(pool, requisitos, weights, k, index, ocupado, rodadas=None, **solver_kwargs):
+    """
+    Resolve um projeto sem repetir colaboradores já recomendados a projetos anteriores.
+
+    Política única para a execução em série e em paralelo: o projeto é resolvido
+    com o índice completo; se escolher alguém marcado em "ocupado", é resolvido
+    de novo sem essas pessoas. Os escolhidos são marcados em "ocupado". Assim o
+    resultado depende só da ordem dos projetos, e não do número de trabalhadores.
+
+    Parameters:
+    - ocupado (np.ndarray): Máscara booleana por posição do pool (alterada aqui).
+    - rodadas (list or None): Resultado de solve_project já calculado com o índice
+      completo (por exemplo num trabalhador); None para resolver aqui.
+
+    Returns:
+    - list: Lista de (posições escolhidas, solve_info) por rodada.
+    """
+    if rodadas is None:
+        rodadas = solve_project(pool, requisitos, weights, k, index, **solver_kwargs)
+    escolhidos = _concat([posicoes for posicoes, _ in rodadas], int)
+    if ocupado[escolhidos].any():
+        livre = index.copy()
+        livre.remove(np.flatnonzero(ocupado))
+        rodadas = solve_project(pool, requisitos, weights, k, livre, **solver_kwargs)
+        escolhidos = _concat([posicoes for posicoes, _ in rodadas], int)
+    ocupado[escolhidos] = True
+    return rodadas
+
+# Pool e índice recebidos uma vez por processo trabalhador
+_pool_trabalhador = None
+_indice_trabalhador = None
+
+def _iniciar_trabalhador(pool, index):
+    global _pool_trabalhador, _indice_trabalhador
+    _pool_trabalhador = pool
+    _indice_trabalhador = index
+
+def _resolver_no_trabalhador(tarefa):
+    projeto, requisitos, weights, k, solver_kwargs = tarefa
+    return projeto, solve_project(_pool_trabalhador, requisitos, weights, k, _indice_trabalhador, **solver_kwargs)
+
+# Estado de cada processo do modelo de ilhas: alocador e toolbox montados uma vez
+_ga_trabalhador = None
+_toolbox_trabalhador = None
+
+def _iniciar_trabalhador_ga(allocator):
+    global _ga_trabalhador, _toolbox_trabalhador
+    _ga_trabalhador = allocator
+    _toolbox_trabalhador = allocator.build_toolbox()
+
+def _evoluir_ilha(tarefa):
+    populacao, ngen, semente, population_size, crossover_prob, mutation_prob = tarefa
+    random.seed(semente)
+    algorithms.eaMuPlusLambda(
+        populacao, _toolbox_trabalhador, mu=population_size//2, lambda_=population_size//2,
+        cxpb=crossover_prob, mutpb=mutation_prob, ngen=ngen, verbose=False
+    )
+    return populacao
+
+def solve_projects_parallel(pool, projetos, weights, k=1, max_workers=None, index=None, resolve_conflicts=True,
+                            **solver_kwargs):
+    """
+    Resolve os projetos em paralelo num ProcessPoolExecutor.
+
+    O pool de candidatos e o índice são enviados uma vez para cada processo.
+    Depois, seguindo a ordem de "projetos", os conflitos são resolvidos com
+    solve_project_without_conflicts: o resultado é igual ao de chamá-la em série.
+
+    Parameters:
+    - pool (CandidatePool or pd.DataFrame): Candidatos.
+    - projetos (dict): Projeto -> lista de argumentos de add_squad_requirement.
+    - weights (dict): Pesos do objetivo.
+    - k (int): Número de rodadas de recomendação por projeto.
+    - max_workers (int or None): Número de processos.
+    - resolve_conflicts (bool): False devolve as rodadas de cada projeto com o
+      índice completo, para quem resolve os conflitos por conta própria.
+
+    Returns:
+    - dict: Projeto -> lista de (posições escolhidas, solve_info) por rodada.
+    """
+    pool = as_pool(pool)
+    index = index if index is not None else RoleGroupIndex(pool)
+
+    tarefas = [(projeto, requisitos, weights, k, solver_kwargs) for projeto, requisitos in projetos.items()]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_trabalhador, initargs=(pool, index)) as executor:
+        resultados = dict(executor.map(_resolver_no_trabalhador, tarefas))
+
+    # Resolução determinística de conflitos: vale a ordem dos projetos
+    if resolve_conflicts:
+        ocupado = np.zeros(len(pool), dtype=bool)
+        for projeto, requisitos in projetos.items():
+            resultados[projeto] = solve_project_without_conflicts(
+                pool, requisitos, weights, k, index, ocupado, rodadas=resultados[projeto], **solver_kwargs
+            )
+
+    return {projeto: resultados[projeto] for projeto in projetos}
+
+class PortfolioAllocatorMILP:
+    """
+    Aloca todos os projetos de uma vez, com uma variável binária por par
+    (colaborador, projeto) e a restrição de que cada colaborador entra em no
+    máximo um projeto.
+    """
+    def __init__(self, df, time_limit=None, mip_gap=None, node_limit=None, index=None):
+        self.df = df
+        self.pool = as_pool(df)
+        self.index = index if index is not None else RoleGroupIndex(self.pool)
+        self.squad_requirements = []
+        self.allocation = {}
+        self.allocation_positions = {}
+        self.weights = {"minimize_projects": 1.0, "minimize_hours": 1.0, "minimize_cost": 1.0}
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+        self.node_limit = node_limit
+        self.build_stats = {}
+        self.presolve_stats = {}
+        self.solve_info = {}
+        self.requirement_rows = []  # Requisitos somados por (projeto, grupo), um por linha de A_eq
+        self.stats = OptimizationStats("portfolio")
+
+    def add_squad_requirement(self, projeto, cargo, setor, classe, quantidade, horas_maximas, projetos_maximos, custo_maximo):
+        self.squad_requirements.append({"projeto": projeto, "cargo": cargo, "setor": setor, "classe": classe, "quantidade": quantidade, "horas_maximas": horas_maximas, "projetos_maximos": projetos_maximos, "custo_maximo": custo_maximo})
+
+    def set_weights(self, weights):
+        self.weights = weights
+
+    def build_model(self):
+        inicio = time.perf_counter()
+
+        projetos = list(dict.fromkeys(req["projeto"] for req in self.squad_requirements))
+
+        # Candidatos de cada requisito
+        with self.stats.phase("match"):
+            candidatos_req = [self.index.get(req['cargo'], req['setor'], req['classe']) for req in self.squad_requirements]
+
+        fim_match = time.perf_counter()
+
+        # Uma variável por par (colaborador, projeto) que algum requisito do projeto pode usar
+        var_colaborador, var_projeto = [], []
+        offset = {}
+        n_vars = 0
+        for p, projeto in enumerate(projetos):
+            candidatos = np.unique(_concat(
+                [ind for req, ind in zip(self.squad_requirements, candidatos_req) if req["projeto"] == projeto], int
+            ))
+            offset[projeto] = (n_vars, candidatos)
+            var_colaborador.append(candidatos)
+            var_projeto.append(np.full(len(candidatos), p))
+            n_vars += len(candidatos)
+        var_colaborador = _concat(var_colaborador, int)
+        var_projeto = _concat(var_projeto, int)
+
+        eq_rows, eq_cols = [], []
+        b_eq = []
+        ub_rows, ub_cols, ub_data = [], [], []
+        b_ub = []
+        n_ub = 0
+
+        linha_req, self.requirement_rows = _somar_requisitos(
+            self.squad_requirements, ('projeto', 'cargo', 'setor', 'classe')
+        )
+        for req, indices, r in zip(self.squad_requirements, candidatos_req, linha_req):
+            inicio_proj, candidatos = offset[req["projeto"]]
+            variaveis = inicio_proj + np.searchsorted(candidatos, indices)
+
+            # Restrição de quantidade do grupo no projeto (requisitos repetidos somados)
+            if r == len(b_eq):
+                eq_rows.append(np.full(len(variaveis), r))
+                eq_cols.append(variaveis)
+                b_eq.append(self.requirement_rows[r]['quantidade'])
+
+            # Restrições individuais, agora sobre a variável do par
+            rows, cols, data, b = _individual_rows(req, variaveis, n_ub)
+            ub_rows.append(rows)
+            ub_cols.append(cols)
+            ub_data.append(data)
+            b_ub.append(b)
+            n_ub += len(rows)
+
+        # Sem dupla alocação: cada colaborador em no máximo um projeto
+        ub_rows.append(n_ub + var_colaborador)
+        ub_cols.append(np.arange(n_vars))
+        ub_data.append(np.ones(n_vars))
+        b_ub.append(np.ones(len(self.pool)))
+        n_ub += len(self.pool)
+
+        eq_cols = _concat(eq_cols, int)
+        A_eq = sparse.coo_matrix(
+            (np.ones(len(eq_cols)), (_concat(eq_rows, int), eq_cols)),
+            shape=(len(self.requirement_rows), n_vars)
+        ).tocsr()
+        A_ub = sparse.coo_matrix(
+            (_concat(ub_data, float), (_concat(ub_rows, int), _concat(ub_cols, int))),
+            shape=(n_ub, n_vars)
+        ).tocsr()
+
+        self.projects = projetos
+        self.var_collaborator = var_colaborador
+        self.var_project = var_projeto
+        self.stats.add_phase("build", time.perf_counter() - fim_match)
+        self.build_stats = {
+            "build_time": time.perf_counter() - inicio,
+            "n_variables": n_vars,
+            "n_eq": A_eq.shape[0],
+            "n_ub": A_ub.shape[0],
+            "nnz": A_eq.nnz + A_ub.nnz,
+        }
+
+        return A_eq, np.array(b_eq, dtype=float), A_ub, _concat(b_ub, float)
+
+    def optimize(self):
+        self.stats = OptimizationStats("portfolio")
+        A_eq, b_eq, A_ub, b_ub = self.build_model()
+
+        # O custo do par é o custo do colaborador, independente do projeto
+        c = _cost_vector(
+            self.weights,
+            self.pool.projetos[self.var_collaborator],
+            self.pool.horas[self.var_collaborator],
+            self.pool.custos[self.var_collaborator],
+        ).astype(float)
+
+        n_vars = len(c)
+        modelo = _presolve_requisitos(
+            self.stats, self.requirement_rows, self.build_stats, c, A_eq, b_eq, A_ub, b_ub, np.zeros(n_vars), np.ones(n_vars)
+        )
+        self.presolve_stats = modelo["stats"]
+
+        x, self.solve_info = _resolver_reduzido(
+            modelo, self.stats, 'milp', time_limit=self.time_limit, mip_gap=self.mip_gap, node_limit=self.node_limit
+        )
+
+        # Agrupar os colaboradores escolhidos por projeto
+        with self.stats.phase("extract"):
+            escolhidas = np.flatnonzero(x > 0)
+            self.allocation = {projeto: [] for projeto in self.projects}
+            self.allocation_positions = {}
+            for p, projeto in enumerate(self.projects):
+                variaveis = escolhidas[self.var_project[escolhidas] == p]
+                self.allocation_positions[projeto] = self.var_collaborator[variaveis]
+                self.allocation[projeto] = [(self.pool.nomes[self.var_collaborator[v]], x[v]) for v in variaveis]
+        self.stats.log_summary()
+
+    def get_allocation_results(self):
+        return self.allocation
+
+    def get_allocation_positions(self):
+        return self.allocation_positions
+
+    def get_build_stats(self):
+        return self.build_stats
+
+    def get_presolve_stats(self):
+        return self.presolve_stats
+
+    def get_solve_info(self):
+        return self.solve_info
+
+    def get_stats(self):
+        return self.stats
+
+def solve_portfolio(pool, projetos, weights, k=1, index=None, time_limit=None, mip_gap=None, node_limit=None):
+    """
+    Resolve as k rodadas de recomendação de todos os projetos juntos com PortfolioAllocatorMILP.
+
+    Cada rodada aloca todos os projetos de uma vez, sem repetir colaboradores;
+    a rodada seguinte é resolvida sem os escolhidos em todas as anteriores. Um
+    projeto inviável sozinho sai desta rodada e das seguintes; se a rodada
+    continua inviável (os projetos disputam os mesmos colaboradores), para.
+
+    Parameters:
+    - projetos (dict): Projeto -> lista de argumentos de SquadAllocatorLP.add_squad_requirement.
+
+    Returns:
+    - dict: Projeto -> lista de (posições escolhidas, solve_info) por rodada, como em solve_projects_parallel.
+    """
+    pool = as_pool(pool)
+    livre = (index if index is not None else RoleGroupIndex(pool)).copy()
+
+    def resolver(ativos):
+        allocator = PortfolioAllocatorMILP(pool, time_limit=time_limit, mip_gap=mip_gap, node_limit=node_limit, index=livre)
+        allocator.set_weights(weights)
+        for projeto in ativos:
+            for requisito in projetos[projeto]:
+                allocator.add_squad_requirement(projeto, *requisito)
+        allocator.optimize()
+        return allocator
+
+    resultados = {projeto: [] for projeto in projetos}
+    ativos = list(projetos)
+    for _ in range(k):
+        allocator = None
+        while ativos and allocator is None:
+            try:
+                allocator = resolver(ativos)
+            except ValueError:
+                viaveis = []
+                for projeto in ativos:
+                    try:
+                        resolver([projeto])
+                        viaveis.append(projeto)
+                    except ValueError:
+                        pass
+                if len(viaveis) == len(ativos):
+                    return resultados
+                ativos = viaveis
+        if allocator is None:
+            break
+
+        posicoes = allocator.get_allocation_positions()
+        for projeto in ativos:
+            resultados[projeto].append((posicoes[projeto], allocator.get_solve_info()))
+        livre.remove(_concat(list(posicoes.values()), int))
+    return resultados
+
 class SquadAllocatorGA:
-    def __init__(self, df):
+    def __init__(self, df, index=None, encoding='bits'):
         self.df = df
+        self.pool = as_pool(df)
+        self.index = index if index is not None else RoleGroupIndex(self.pool)
+        self.encoding = encoding  # 'bits' (um bit por colaborador) ou 'requisitos' (posições por requisito)
+        self.allocation_positions = np.empty(0, dtype=int)
         self.weights = {
             "minimize_projects": 1.0,
             "minimize_hours": 1.0,
@@ -119,15 +1127,20 @@ class SquadAllocatorGA:
             "maximize_hours_sold": 1.0
         }
         self.squad_requirements = []
+        self.hall_of_fame = None
+        self.logbook = None
+        self.pareto_front = []
+        self.run_info = {}
+        self.stats = OptimizationStats("ga")
 
     def set_weights(self, weights):
         self.weights = weights
 
     def fitness(self, individual):
-        allocation = np.array(individual)
-        horas_disponiveis = self.df["col_hora_alocada"].values
-        projetos = self.df["col_number_proj"].values
-        custo_hora = self.df["col_custo_hora"].values
+        allocation = np.asarray(individual)
+        horas_disponiveis = self.pool.horas
+        projetos = self.pool.projetos
+        custo_hora = self.pool.custos
 
         score = (
             self.weights["minimize_projects"] * np.sum(projetos * allocation) +
@@ -141,10 +1154,10 @@ class SquadAllocatorGA:
         self.squad_requirements.append((cargo, setor, classe, quantidade, horas_vendidas))
 
     def evaluate(self, individual):
-        allocation = np.array(individual)
-        horas_disponiveis = self.df["col_hora_alocada"].values
-        projetos = self.df["col_number_proj"].values
-        custo_hora = self.df["col_custo_hora"].values
+        allocation = np.asarray(individual)
+        horas_disponiveis = self.pool.horas
+        projetos = self.pool.projetos
+        custo_hora = self.pool.custos
 
         score = (
             self.weights["minimize_projects"] * np.sum(projetos * allocation) +
@@ -154,50 +1167,330 @@ class SquadAllocatorGA:
 
         return (score,)
 
-    def optimize(self, population_size=50, generations=50, crossover_prob=0.7, mutation_prob=0.2):
-        random.seed(42)
+    def requirement_groups(self):
+        """
+        Candidatos e quantidade de cada grupo (cargo, setor, classe) exigido.
+
+        Requisitos repetidos para o mesmo grupo são somados, como no
+        SquadAllocatorLP e no PortfolioAllocatorMILP, então os grupos são
+        disjuntos e um colaborador só pode aparecer em um segmento.
+
+        Returns:
+        - list: Lista de (posições candidatas, quantidade), na ordem dos requisitos.
+        """
+        quantidades = {}
+        for cargo, setor, classe, quantidade, _ in self.squad_requirements:
+            if quantidade > 0:
+                chave = (cargo, setor, classe)
+                quantidades[chave] = quantidades.get(chave, 0) + int(quantidade)
+
+        grupos = []
+        for chave, quantidade in quantidades.items():
+            candidatos = self.index.get(*chave)
+            if len(candidatos) < quantidade:
+                raise ValueError(
+                    f"Requisito inviável: {chave} pede {quantidade} colaboradores e há {len(candidatos)} candidatos."
+                )
+            grupos.append((candidatos, quantidade))
+        return grupos
+
+    def _segments(self, grupos):
+        # Fatia do cromossomo ocupada por cada grupo
+        fim = np.cumsum([quantidade for _, quantidade in grupos], dtype=int)
+        return [slice(int(f) - q, int(f)) for f, (_, q) in zip(fim, grupos)]
+
+    def _init_requirements(self, individual_class, grupos, listas):
+        genes = []
+        for candidatos, (_, quantidade) in zip(listas, grupos):
+            genes.extend(random.sample(candidatos, quantidade))
+        return individual_class(genes)
+
+    def _repair(self, individual, grupos, segmentos, listas, conjuntos):
+        # Troca posições repetidas ou fora do grupo por candidatos ainda livres
+        for candidatos, validos, segmento in zip(listas, conjuntos, segmentos):
+            vistos = set()
+            pendentes = []
+            for i in range(segmento.start, segmento.stop):
+                if individual[i] in validos and individual[i] not in vistos:
+                    vistos.add(individual[i])
+                else:
+                    pendentes.append(i)
+            if pendentes:
+                livres = [p for p in candidatos if p not in vistos]
+                for i, p in zip(pendentes, random.sample(livres, len(pendentes))):
+                    individual[i] = p
+        return individual
 
-        creator.create("FitnessMax", base.Fitness, weights=(1.0,))
-        creator.create("Individual", list, fitness=creator.FitnessMax)
+    def _mate_requirements(self, ind1, ind2, grupos, segmentos, listas, conjuntos, indpb=0.5):
+        # Cruzamento uniforme dentro de cada segmento, seguido de reparo
+        for segmento in segmentos:
+            for i in range(segmento.start, segmento.stop):
+                if random.random() < indpb:
+                    ind1[i], ind2[i] = ind2[i], ind1[i]
+        self._repair(ind1, grupos, segmentos, listas, conjuntos)
+        self._repair(ind2, grupos, segmentos, listas, conjuntos)
+        return ind1, ind2
+
+    def _mutate_requirements(self, individual, grupos, segmentos, indpb=0.2):
+        # Substitui colaboradores por candidatos do mesmo grupo que não estão no squad
+        for (candidatos, quantidade), segmento in zip(grupos, segmentos):
+            if len(candidatos) == quantidade:
+                continue
+            for i in range(segmento.start, segmento.stop):
+                if random.random() < indpb:
+                    atuais = set(individual[segmento])
+                    while True:
+                        p = int(candidatos[random.randrange(len(candidatos))])
+                        if p not in atuais:
+                            break
+                    individual[i] = p
+        return (individual,)
+
+    def _evaluate_requirements(self, individual, custo):
+        return (float(custo[np.asarray(individual, dtype=int)].sum()),)
+
+    def objectives(self, individual):
+        # Projetos, horas e custo somados sobre o squad do indivíduo (só na codificação 'requisitos', sem pesos)
+        posicoes = np.asarray(individual, dtype=int)
+        return (
+            float(self.pool.projetos[posicoes].sum()),
+            float(self.pool.horas[posicoes].sum()),
+            float(self.pool.custos[posicoes].sum()),
+        )
+
+    def build_toolbox(self, multiobjective=False):
+        """
+        Monta o toolbox do DEAP para a codificação escolhida.
+
+        Em 'requisitos' o cromossomo tem exatamente "quantidade" posições
+        distintas por grupo; cruzamento e mutação preservam a viabilidade e o
+        objetivo (minimizado) é o mesmo custo ponderado do LP. Com
+        multiobjective=True os três objetivos são avaliados separadamente e a
+        seleção é a do NSGA-II, disponível apenas em 'requisitos'.
+        """
+        if multiobjective and self.encoding != 'requisitos':
+            # Em 'bits' o squad final vem de allocate_positions e não dos bits ligados,
+            # então os objetivos avaliados não descreveriam o squad devolvido
+            raise ValueError("A fronteira de Pareto exige encoding='requisitos'.")
 
         toolbox = base.Toolbox()
-        toolbox.register("attr_bool", random.randint, 0, 1)
-        toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_bool, n=len(self.df))
-        toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-        toolbox.register("mate", tools.cxTwoPoint)
-        toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
-        toolbox.register("select", tools.selTournament, tournsize=3)
-        toolbox.register("evaluate", self.evaluate)
+        if self.encoding == 'requisitos':
+            grupos = self.requirement_groups()
+            segmentos = self._segments(grupos)
+            # Candidatos de cada grupo como lista (sorteio) e conjunto (validação), montados uma vez
+            listas = [candidatos.tolist() for candidatos, _ in grupos]
+            conjuntos = [set(candidatos) for candidatos in listas]
+            custo = _cost_vector(self.weights, self.pool.projetos, self.pool.horas, self.pool.custos)
+            classe = creator.ParetoIndividual if multiobjective else creator.SquadIndividual
+
+            toolbox.register("individual", self._init_requirements, classe, grupos, listas)
+            toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+            toolbox.register(
+                "mate", self._mate_requirements, grupos=grupos, segmentos=segmentos, listas=listas, conjuntos=conjuntos
+            )
+            toolbox.register("mutate", self._mutate_requirements, grupos=grupos, segmentos=segmentos)
+            toolbox.register("select", tools.selTournament, tournsize=3)
+            toolbox.register("evaluate", self._evaluate_requirements, custo=custo)
+        else:
+            classe = creator.Individual
+
+            toolbox.register("attr_bool", random.randint, 0, 1)
+            toolbox.register("individual", tools.initRepeat, classe, toolbox.attr_bool, n=len(self.pool))
+            toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+            toolbox.register("mate", tools.cxTwoPoint)
+            toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+            toolbox.register("select", tools.selTournament, tournsize=3)
+            toolbox.register("evaluate", self.evaluate)
 
-        population = toolbox.population(n=population_size)
+        if multiobjective:
+            toolbox.register("evaluate", self.objectives)
+            toolbox.register("select", tools.selNSGA2)
+        return toolbox
+
+    def optimize(self, population_size=50, generations=50, crossover_prob=0.7, mutation_prob=0.2,
+                 time_limit=None, stall_generations=None, hall_of_fame_size=1, verbose=__debug__):
+        """
+        Executa o GA e retorna o melhor squad encontrado.
+
+        Modo anytime: "generations" é o máximo de gerações; com "time_limit"
+        (segundos) ou "stall_generations" (gerações sem melhora do melhor
+        fitness) a evolução pode parar antes. O melhor indivíduo vem do hall da
+        fama, então nunca é pior que o melhor já avaliado. O hall da fama, o
+        logbook por geração e o motivo da parada ficam disponíveis em
+        get_hall_of_fame(), get_logbook() e get_run_info(), e os tempos por fase
+        e por geração em get_stats().
+        """
+        random.seed(42)
+        self.stats = OptimizationStats("ga")
+
+        with self.stats.phase("build_toolbox"):
+            toolbox = self.build_toolbox()
+
+        with self.stats.phase("init"):
+            population = toolbox.population(n=population_size)
 
         stats = tools.Statistics(lambda ind: ind.fitness.values)
         stats.register("avg", np.mean)
         stats.register("min", np.min)
 
-        algorithms.eaMuPlusLambda(
-            population, toolbox, mu=population_size//2, lambda_=population_size//2, cxpb=crossover_prob, mutpb=mutation_prob, ngen=generations, stats=stats, halloffame=None
-        )
+        self.hall_of_fame = tools.HallOfFame(hall_of_fame_size)
+        inicio = time.perf_counter()
+        with self.stats.phase("evolve"):
+            population, self.logbook, motivo = evolve(
+                population, toolbox, mu=population_size//2, lambda_=population_size//2, cxpb=crossover_prob, mutpb=mutation_prob, ngen=generations, stats=stats, halloffame=self.hall_of_fame,
+                verbose=verbose, time_limit=time_limit, stall_generations=stall_generations, on_generation=self.stats.add_generation
+            )
+        self.run_info = {
+            "generations": self.logbook[-1]["gen"],
+            "stopped": motivo,
+            "elapsed": time.perf_counter() - inicio,
+            "best_fitness": self.hall_of_fame[0].fitness.values,
+        }
+        self.stats.record(**self.run_info)
 
-        best_individual = tools.selBest(population, 1)[0]
+        best_individual = self.hall_of_fame[0]
 
-        allocation_results = self.allocate_collaborators(best_individual)
+        with self.stats.phase("extract"):
+            self.allocation_positions = self.allocate_positions(best_individual)
+            allocation_results = [f"{self.pool.nomes[i]}" for i in self.allocation_positions]
 
+        self.stats.log_summary()
         return allocation_results
 
-    def allocate_collaborators(self, individual):
-        allocation_results = []
-        squad_counts = {req[0]: req[3] for req in self.squad_requirements}
+    def optimize_islands(self, n_islands=4, population_size=50, generations=50, migration_interval=5, migration_size=2,
+                         crossover_prob=0.7, mutation_prob=0.2, max_workers=None):
+        """
+        Modelo de ilhas: "n_islands" populações evoluem em processos separados e,
+        a cada "migration_interval" gerações, os "migration_size" melhores de cada
+        ilha substituem os piores da ilha seguinte (anel).
+
+        O alocador é enviado uma vez para cada processo; por época só as
+        populações trafegam. O resultado é determinístico para o mesmo número
+        de ilhas, independente de "max_workers".
+
+        Returns:
+        - list: Nomes dos colaboradores do melhor indivíduo entre todas as ilhas.
+        """
+        random.seed(42)
+        self.stats = OptimizationStats("ga_islands")
+
+        with self.stats.phase("build_toolbox"):
+            toolbox = self.build_toolbox()
+        with self.stats.phase("init"):
+            ilhas = [toolbox.population(n=population_size) for _ in range(n_islands)]
+
+        with ProcessPoolExecutor(max_workers=max_workers or n_islands, initializer=_iniciar_trabalhador_ga, initargs=(self,)) as executor:
+            geracoes = 0
+            while geracoes < generations:
+                ngen = min(migration_interval, generations - geracoes)
+                tarefas = [(ilha, ngen, random.randrange(2**32), population_size, crossover_prob, mutation_prob) for ilha in ilhas]
+                with self.stats.phase("evolve", generations=ngen):
+                    ilhas = list(executor.map(_evoluir_ilha, tarefas))
+                geracoes += ngen
+                if geracoes < generations and n_islands > 1:
+                    with self.stats.phase("migrate"):
+                        tools.migRing(ilhas, migration_size, tools.selBest, replacement=tools.selWorst)
+
+        with self.stats.phase("extract"):
+            best_individual = tools.selBest([ind for ilha in ilhas for ind in ilha], 1)[0]
+
+            self.allocation_positions = self.allocate_positions(best_individual)
+            allocation_results = [f"{self.pool.nomes[i]}" for i in self.allocation_positions]
+
+        self.stats.record(islands=n_islands, generations=geracoes, best_fitness=best_individual.fitness.values)
+        self.stats.log_summary()
+        return allocation_results
+
+    def optimize_pareto(self, population_size=100, generations=50, crossover_prob=0.7, mutation_prob=0.2, time_limit=None):
+        """
+        NSGA-II sobre projetos, horas e custo: uma execução gera a fronteira de
+        Pareto inteira, e a escolha entre os pontos (select_pareto_point) não
+        exige otimizar de novo quando os pesos mudam.
+
+        Só é suportado com encoding='requisitos' (ValueError caso contrário).
+
+        Returns:
+        - list: Pontos não dominados, sem repetição e ordenados pelos objetivos,
+          cada um com "positions", "nomes" e "objetivos" (projetos, horas, custo).
+        """
+        random.seed(42)
+        self.stats = OptimizationStats("ga_pareto")
+
+        with self.stats.phase("build_toolbox"):
+            toolbox = self.build_toolbox(multiobjective=True)
+        with self.stats.phase("init"):
+            population = toolbox.population(n=population_size)
 
-        for i, collaborator in enumerate(self.df["col_nome"].values):
-            if individual[i]:
-                cargo_colaborador = self.df["col_cargo"].values[i]
+        inicio = time.perf_counter()
+        with self.stats.phase("evolve"):
+            population, self.logbook, motivo = evolve(
+                population, toolbox, mu=population_size, lambda_=population_size, cxpb=crossover_prob, mutpb=mutation_prob,
+                ngen=generations, verbose=False, time_limit=time_limit, on_generation=self.stats.add_generation
+            )
 
-                if cargo_colaborador in squad_counts and squad_counts[cargo_colaborador] > 0:
-                    allocation_results.append(f"{collaborator}")
-                    squad_counts[cargo_colaborador] -= 1
+        inicio_extracao = time.perf_counter()
+        pontos = {}
+        for ind in tools.sortNondominated(population, len(population), first_front_only=True)[0]:
+            posicoes = self.allocate_positions(ind)
+            pontos.setdefault(tuple(posicoes.tolist()), (ind.fitness.values, posicoes))
 
-                if not any(squad_counts.values()):  # Todas as posições do squad foram preenchidas
-                    break
+        self.pareto_front = [
+            {
+                "positions": posicoes,
+                "nomes": [f"{self.pool.nomes[i]}" for i in posicoes],
+                "objetivos": dict(zip(OBJETIVOS_PARETO, valores)),
+            }
+            for valores, posicoes in sorted(pontos.values(), key=lambda ponto: ponto[0])
+        ]
+        self.run_info = {
+            "generations": self.logbook[-1]["gen"],
+            "stopped": motivo,
+            "elapsed": time.perf_counter() - inicio,
+            "front_size": len(self.pareto_front),
+        }
+        self.stats.add_phase("extract", time.perf_counter() - inicio_extracao)
+        self.stats.record(**self.run_info)
+        self.stats.log_summary()
+        return self.pareto_front
+
+    def get_pareto_front(self):
+        return self.pareto_front
+
+    def get_stats(self):
+        return self.stats
+
+    def get_allocation_positions(self):
+        return self.allocation_positions
+
+    def get_hall_of_fame(self):
+        return self.hall_of_fame
+
+    def get_logbook(self):
+        return self.logbook
+
+    def get_run_info(self):
+        return self.run_info
+
+    def allocate_positions(self, individual):
+        if self.encoding == 'requisitos':
+            # O cromossomo já é a lista de posições escolhidas
+            return np.sort(np.asarray(individual, dtype=int))
 
-        return allocation_results
\ No newline at end of file
+        squad_counts = {}
+        for req in self.squad_requirements:
+            squad_counts[req[0]] = squad_counts.get(req[0], 0) + req[3]
+        selecionados = np.asarray(individual, dtype=bool)
+
+        # Para cada cargo, os primeiros colaboradores selecionados até completar a quantidade
+        escolhidos = []
+        for cargo, quantidade in squad_counts.items():
+            if quantidade > 0:
+                posicoes = self.index.by_cargo(cargo)
+                escolhidos.append(posicoes[selecionados[posicoes]][:quantidade])
+
+        return np.sort(_concat(escolhidos, int))
+
+    def allocate_collaborators(self, individual):
+        allocation_results = [f"{self.pool.nomes[i]}" for i in self.allocate_positions(individual)]
+
+        return allocation_results
@@ -0,0 +1,133 @@
+import math
+import re
+
+import pandas as pd
+
+# Operadores da filter_query do DataTable -> operador canônico
+OPERADORES_FILTRO = {
+    "=": "eq", "eq": "eq",
+    "!=": "ne", "ne": "ne",
+    "<": "lt", "lt": "lt",
+    "<=": "le", "le": "le",
+    ">": "gt", "gt": "gt",
+    ">=": "ge", "ge": "ge",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+_PARTE_FILTRO = re.compile(r"^\{(?P<coluna>[^}]+)\}\s*(?P<operador>[a-z]*[<>=!]*)\s*(?P<valor>.*)$", re.IGNORECASE)
+
+def separar_filtro(parte):
+    """
+    Separa uma condição da filter_query ("{coluna} operador valor").
+
+    Os prefixos "i" (sem diferenciar maiúsculas) e "s" (diferenciando) dos
+    operadores são aceitos; o valor perde as aspas e vira número quando possível.
+
+    Returns:
+    - tuple: (coluna, operador canônico, valor, sem_caixa) ou None se a condição não for reconhecida.
+    """
+    encontrado = _PARTE_FILTRO.match(parte.strip())
+    if encontrado is None:
+        return None
+
+    operador = encontrado.group("operador").lower()
+    sem_caixa = False
+    if operador not in OPERADORES_FILTRO and operador[:1] in ("i", "s") and operador[1:] in OPERADORES_FILTRO:
+        sem_caixa = operador[0] == "i"
+        operador = operador[1:]
+    if operador not in OPERADORES_FILTRO:
+        return None
+
+    valor = encontrado.group("valor").strip()
+    if len(valor) >= 2 and valor[0] == valor[-1] and valor[0] in "\"'`":
+        valor = valor[1:-1].replace("\\" + valor[0], valor[0])
+    else:
+        try:
+            valor = float(valor)
+        except ValueError:
+            pass
+    return encontrado.group("coluna"), OPERADORES_FILTRO[operador], valor, sem_caixa
+
+def filtrar(df, filter_query):
+    """
+    Aplica a filter_query do DataTable (condições unidas por "&&") ao DataFrame.
+
+    Condições em colunas que não existem ou que não puderem ser lidas são ignoradas.
+
+    Returns:
+    - pd.DataFrame: As linhas que atendem a todas as condições.
+    """
+    if not filter_query:
+        return df
+
+    mascara = pd.Series(True, index=df.index)
+    for parte in filter_query.split(" && "):
+        condicao = separar_filtro(parte)
+        if condicao is None or condicao[0] not in df.columns:
+            continue
+        coluna, operador, valor, sem_caixa = condicao
+        serie = df[coluna]
+
+        if operador in ("contains", "datestartswith"):
+            texto = serie.astype(str)
+            valor = _texto_filtro(valor)
+            if sem_caixa:
+                texto, valor = texto.str.lower(), valor.lower()
+            mascara &= texto.str.contains(valor, regex=False) if operador == "contains" else texto.str.startswith(valor)
+            continue
+
+        # Comparações: numéricas quando a coluna é numérica, senão como texto
+        if pd.api.types.is_numeric_dtype(serie):
+            if not isinstance(valor, float):
+                try:
+                    valor = float(valor)
+                except ValueError:
+                    mascara &= operador == "ne"
+                    continue
+        else:
+            serie = serie.astype(str)
+            valor = _texto_filtro(valor)
+            if sem_caixa:
+                serie, valor = serie.str.lower(), valor.lower()
+        mascara &= getattr(serie, operador)(valor)
+
+    return df[mascara.to_numpy()]
+
+def _texto_filtro(valor):
+    # Números lidos da filter_query voltam a texto sem ".0"
+    if isinstance(valor, float):
+        return str(int(valor)) if valor.is_integer() else repr(valor)
+    return valor
+
+def ordenar(df, sort_by):
+    """
+    Ordena o DataFrame pelo sort_by do DataTable ([{"column_id", "direction"}]).
+
+    Returns:
+    - pd.DataFrame: O DataFrame ordenado (o mesmo, se não houver ordenação válida).
+    """
+    criterios = [c for c in (sort_by or []) if c["column_id"] in df.columns]
+    if not criterios:
+        return df
+    return df.sort_values(
+        [c["column_id"] for c in criterios],
+        ascending=[c["direction"] == "asc" for c in criterios],
+        kind="mergesort",
+    )
+
+def pagina_tabela(df, page_current, page_size, sort_by=None, filter_query=None):
+    """
+    Filtra, ordena e recorta uma página do DataFrame para um DataTable com
+    page_action, sort_action e filter_action "custom". Uma página além da
+    última devolve a última página.
+
+    Returns:
+    - tuple: (registros da página, número de páginas).
+    """
+    df = ordenar(filtrar(df, filter_query), sort_by)
+    page_size = max(int(page_size or 1), 1)
+    paginas = max(math.ceil(len(df) / page_size), 1)
+    # Depois de um filtro que reduz as linhas, a página atual pode ter deixado de existir
+    inicio = min(max(int(page_current or 0), 0), paginas - 1) * page_size
+    return df.iloc[inicio:inicio + page_size].to_dict('records'), paginas
@@ -0,0 +1,431 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+ARQUIVO_ALOCACOES = "data_input/alocamento_colaboradores_projetos.csv"
+
+# Colunas de texto guardadas como categorias no snapshot
+COLUNAS_CATEGORICAS = ['col_matricula', 'col_nome', 'col_cargo', 'col_setor', 'col_classe', 'pro_number']
+
+def codificar_categorias(df):
+    """
+    Converte as colunas de texto conhecidas (matrícula, cargo, setor, classe,
+    projeto) em categorias, mantendo os códigos inteiros até a interface.
+    """
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+def ler_csv_alocacoes(filename=ARQUIVO_ALOCACOES, **kwargs):
+    """
+    Lê o CSV já com as colunas de texto como categorias.
+
+    Em arquivos grandes o read_csv junta as categorias de cada bloco interno sem
+    ordená-las; elas são ordenadas aqui para que o groupby(observed=True), a
+    ordem das linhas da visão macro e o desempate do LP sejam os mesmos do
+    caminho em blocos e do groupby sobre texto.
+    """
+    alocamentos = pd.read_csv(filename, dtype={coluna: 'category' for coluna in COLUNAS_CATEGORICAS}, **kwargs)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in alocamentos.columns:
+            categorias = alocamentos[coluna].cat.categories
+            if not categorias.is_monotonic_increasing:
+                alocamentos[coluna] = alocamentos[coluna].cat.reorder_categories(categorias.sort_values())
+    return alocamentos
+
+def caminho_snapshot(filename=ARQUIVO_ALOCACOES):
+    return os.path.splitext(filename)[0] + ".snapshot"
+
+def identidade_arquivo(filename):
+    # Tamanho e mtime (ns) do arquivo de origem, gravados no snapshot
+    info = os.stat(filename)
+    return {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+# Arquivo que aponta a versão publicada de uma tabela do snapshot
+PONTEIRO_TABELA = "atual.json"
+# Trava de gravação de uma tabela do snapshot e idade (s) a partir da qual ela é
+# considerada abandonada por um processo que morreu no meio da gravação
+TRAVA_TABELA = ".gravando"
+TRAVA_EXPIRADA = 600
+
+def _travar(pasta):
+    # Cria a trava de forma exclusiva; FileExistsError se outro processo está gravando
+    trava = os.path.join(pasta, TRAVA_TABELA)
+    for _ in range(2):
+        try:
+            os.close(os.open(trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return trava
+        except FileExistsError:
+            try:
+                abandonada = time.time() - os.path.getmtime(trava) > TRAVA_EXPIRADA
+            except OSError:
+                continue  # liberada entre as duas chamadas
+            if not abandonada:
+                raise
+            with contextlib.suppress(OSError):
+                os.remove(trava)
+    raise FileExistsError(trava)
+
+def salvar_tabela(df, pasta, origem=None):
+    """
+    Grava o DataFrame em formato colunar: um .npy por coluna, com as colunas de
+    texto como códigos inteiros + categorias, e o colunas.json com as colunas e a
+    identidade do arquivo de origem ("origem").
+
+    Cada gravação cria uma versão nova (subpasta de "pasta") que nunca é
+    alterada depois; ela é publicada trocando atomicamente o ponteiro
+    atual.json. Um leitor em outro processo vê sempre a versão inteira anterior
+    ou a nova, e os mapeamentos em memória (mmap) das versões antigas
+    continuam válidos depois que elas são apagadas. Só um processo grava por
+    vez: se outro já está gravando a tabela, levanta FileExistsError.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    trava = _travar(pasta)
+    try:
+        versao = tempfile.mkdtemp(prefix="v-", dir=pasta)
+        colunas = []
+        for coluna in df.columns:
+            serie = df[coluna]
+            if coluna in COLUNAS_CATEGORICAS or isinstance(serie.dtype, pd.CategoricalDtype):
+                categorica = pd.Categorical(serie)
+                np.save(os.path.join(versao, coluna + ".codes.npy"), categorica.codes)
+                np.save(os.path.join(versao, coluna + ".categorias.npy"), np.asarray(categorica.categories, dtype=str))
+                colunas.append({"nome": coluna, "tipo": "categoria"})
+            else:
+                np.save(os.path.join(versao, coluna + ".npy"), serie.to_numpy())
+                colunas.append({"nome": coluna, "tipo": "numerico"})
+        with open(os.path.join(versao, "colunas.json"), "w") as arquivo:
+            json.dump({"origem": origem, "colunas": colunas}, arquivo)
+
+        # Publica a versão: o ponteiro é escrito ao lado e trocado com os.replace
+        descritor, temporario = tempfile.mkstemp(prefix=".atual-", dir=pasta)
+        with os.fdopen(descritor, "w") as arquivo:
+            json.dump({"versao": os.path.basename(versao), "origem": origem}, arquivo)
+        os.replace(temporario, os.path.join(pasta, PONTEIRO_TABELA))
+
+        # Apaga o que não é a versão publicada: versões antigas, gravações interrompidas
+        # e arquivos do formato sem versões
+        for nome in os.listdir(pasta):
+            if nome in (os.path.basename(versao), PONTEIRO_TABELA, TRAVA_TABELA):
+                continue
+            caminho = os.path.join(pasta, nome)
+            if os.path.isdir(caminho):
+                shutil.rmtree(caminho, ignore_errors=True)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(caminho)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(trava)
+
+def _ler_ponteiro(pasta):
+    # {"versao", "origem"} da versão publicada; {} se não houver versão publicada
+    try:
+        with open(os.path.join(pasta, PONTEIRO_TABELA)) as arquivo:
+            ponteiro = json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+    return ponteiro if isinstance(ponteiro, dict) else {}
+
+def carregar_tabela(pasta, mmap=True):
+    """
+    Lê a versão publicada de uma tabela gravada por salvar_tabela. Com mmap=True
+    as colunas numéricas e os códigos são mapeados em memória em vez de copiados.
+
+    Levanta FileNotFoundError se não houver versão publicada (ou se ela acabou
+    de ser substituída e apagada por outro processo).
+    """
+    versao = _ler_ponteiro(pasta).get("versao")
+    if not versao:
+        raise FileNotFoundError(os.path.join(pasta, PONTEIRO_TABELA))
+    pasta = os.path.join(pasta, versao)
+
+    modo = "r" if mmap else None
+    with open(os.path.join(pasta, "colunas.json")) as arquivo:
+        colunas = json.load(arquivo)["colunas"]
+
+    dados = {}
+    for coluna in colunas:
+        nome = coluna["nome"]
+        if coluna["tipo"] == "categoria":
+            codes = np.load(os.path.join(pasta, nome + ".codes.npy"), mmap_mode=modo)
+            categorias = np.load(os.path.join(pasta, nome + ".categorias.npy")).astype(object)
+            dados[nome] = pd.Categorical.from_codes(codes, categorias)
+        else:
+            dados[nome] = np.load(os.path.join(pasta, nome + ".npy"), mmap_mode=modo)
+    return pd.DataFrame(dados, copy=False)
+
+def snapshot_atualizado(filename=ARQUIVO_ALOCACOES, parte="visao_macro"):
+    # O snapshot vale enquanto a identidade gravada for a do CSV atual (vale também para
+    # um CSV restaurado com datas antigas, p.ex. cp -p ou rsync -t)
+    origem = _ler_ponteiro(os.path.join(caminho_snapshot(filename), parte)).get("origem")
+    try:
+        return origem is not None and origem == identidade_arquivo(filename)
+    except OSError:
+        return False
+
+def salvar_snapshot(filename=ARQUIVO_ALOCACOES, alocamentos=None, visao_macro=None, origem=None):
+    """
+    Grava as partes informadas do snapshot. "origem" é a identidade do CSV lida
+    antes de agregá-lo (identidade_arquivo); sem ela é lida agora.
+    """
+    pasta = caminho_snapshot(filename)
+    origem = origem if origem is not None else identidade_arquivo(filename)
+    if alocamentos is not None:
+        salvar_tabela(alocamentos, os.path.join(pasta, "alocacoes"), origem)
+    if visao_macro is not None:
+        salvar_tabela(visao_macro, os.path.join(pasta, "visao_macro"), origem)
+
+def carregar_snapshot(filename=ARQUIVO_ALOCACOES, parte="visao_macro", mmap=True):
+    return carregar_tabela(os.path.join(caminho_snapshot(filename), parte), mmap=mmap)
+
+def carregar_alocacoes(filename=ARQUIVO_ALOCACOES):
+    """
+    Retorna as alocações brutas, do snapshot quando ele está atualizado e do CSV
+    caso contrário.
+    """
+    if snapshot_atualizado(filename, "alocacoes"):
+        try:
+            return carregar_snapshot(filename, "alocacoes")
+        except (OSError, ValueError):
+            pass  # versão trocada por outro processo durante a leitura: lê o CSV
+    return ler_csv_alocacoes(filename)
+
+# Especificação da agregação por colaborador (col_matricula)
+AGREGACAO = {
+    'col_custo': 'first',
+    'col_cargo': 'first',
+    'col_setor': 'first',
+    'col_classe': 'first',
+    'pro_number': 'nunique',
+    'horas_alocadas': 'sum'
+}
+
+def agregar_visao_macro(alocamentos):
+    """
+    Agrega as alocações por colaborador.
+
+    Parameters:
+    - alocamentos (pd.DataFrame): Alocações brutas (uma linha por colaborador e projeto).
+
+    Returns:
+    - pd.DataFrame: Retorna o DataFrame da visão macro.
+    """
+    visao_macro = agrupar(alocamentos, AGREGACAO).reset_index()
+    return _renomear_visao_macro(visao_macro)
+
+def agrupar(alocamentos, agregacao, chave='col_matricula'):
+    """
+    groupby(chave).agg(agregacao) com "first" das colunas categóricas feito
+    sobre os códigos inteiros: no pandas o "first" de uma categoria cai num
+    caminho lento, linha a linha.
+    """
+    categorias = {
+        coluna: alocamentos[coluna].cat.categories
+        for coluna, funcao in agregacao.items()
+        if funcao == 'first' and isinstance(alocamentos[coluna].dtype, pd.CategoricalDtype)
+    }
+    # Código -1 (nulo) vira NaN para continuar sendo ignorado pelo "first"
+    codigos = {coluna: alocamentos[coluna].cat.codes.where(alocamentos[coluna].cat.codes >= 0) for coluna in categorias}
+
+    agregado = alocamentos.assign(**codigos).groupby(chave, observed=True).agg(agregacao)
+    for coluna, categoria in categorias.items():
+        agregado[coluna] = pd.Categorical.from_codes(agregado[coluna].fillna(-1).astype(int), categoria)
+    return agregado
+
+def _renomear_visao_macro(visao_macro):
+    visao_macro.columns = ['col_nome', 'col_custo_hora', 'col_cargo', 'col_setor', 'col_classe',
+                            'col_number_proj', 'col_hora_alocada']
+    return visao_macro
+
+def agregar_em_blocos(filename, agregacao, chave='col_matricula', chunksize=500_000):
+    """
+    Agrega o CSV lendo blocos de "chunksize" linhas e combinando agregados parciais.
+
+    "first" e "sum" guardam no máximo uma linha por colaborador. "nunique"
+    guarda os pares distintos (colaborador, valor) como um inteiro de 64 bits
+    (códigos dos dois lados), deduplicados quando o acumulado passa do dobro do
+    último tamanho deduplicado. A memória é limitada pelo número de pares
+    distintos (colaborador, valor) mais um bloco, não pelo número de linhas, e o
+    custo total é linear no número de linhas. O resultado é igual ao de
+    pd.read_csv(filename).groupby(chave).agg(agregacao).reset_index().
+
+    Parameters:
+    - filename (str): Caminho do CSV.
+    - agregacao (dict): Coluna -> 'first', 'sum' ou 'nunique'.
+    - chave (str): Coluna de agrupamento.
+    - chunksize (int): Número de linhas por bloco.
+
+    Returns:
+    - pd.DataFrame: Retorna o DataFrame agregado.
+    """
+    primeiros = [c for c, f in agregacao.items() if f == 'first']
+    somas = [c for c, f in agregacao.items() if f == 'sum']
+    distintos = [c for c, f in agregacao.items() if f == 'nunique']
+    funcoes = set(agregacao.values()) - {'first', 'sum', 'nunique'}
+    if funcoes:
+        raise ValueError(f"Agregação não suportada em blocos: {sorted(funcoes)}")
+
+    parcial_primeiros = None
+    parcial_somas = None
+    # Códigos inteiros das chaves e dos valores do "nunique", estáveis entre blocos
+    indice_chaves = None
+    indices_valores = {c: None for c in distintos}
+    pares_unicos = {c: np.empty(0, dtype=np.int64) for c in distintos}
+    pares_pendentes = {c: [] for c in distintos}
+
+    for bloco in pd.read_csv(filename, chunksize=chunksize, usecols=[chave, *agregacao]):
+        # Como no groupby, linhas sem chave ficam de fora
+        bloco = bloco[bloco[chave].notna()]
+        indice_chaves, codigos = _codificar(indice_chaves, bloco[chave])
+        grupos = bloco.groupby(codigos)
+
+        # Parciais indexados pelo código da chave: a combinação não reordena textos
+        # "first" ignora nulos: o primeiro valor válido do bloco mais antigo prevalece
+        if primeiros:
+            atual = grupos[primeiros].first()
+            parcial_primeiros = atual if parcial_primeiros is None else pd.concat([parcial_primeiros, atual]).groupby(level=0).first()
+
+        if somas:
+            atual = grupos[somas].sum()
+            parcial_somas = atual if parcial_somas is None else pd.concat([parcial_somas, atual]).groupby(level=0).sum()
+
+        # Contagem distinta combinável: pares únicos (chave, valor) num inteiro de 64 bits
+        for c in distintos:
+            valido = bloco[c].notna().to_numpy()
+            indices_valores[c], codigos_valor = _codificar(indices_valores[c], bloco[c][valido])
+            pendentes = pares_pendentes[c]
+            pendentes.append(np.unique((codigos[valido].astype(np.int64) << 32) | codigos_valor.astype(np.int64)))
+            if sum(len(p) for p in pendentes) > max(2 * len(pares_unicos[c]), chunksize):
+                pares_unicos[c] = np.unique(np.concatenate([pares_unicos[c], *pendentes]))
+                pendentes.clear()
+
+    # Junta os parciais por código e volta às chaves, ordenadas como no groupby
+    if indice_chaves is None:
+        indice_chaves = pd.Index([])
+    resultado = pd.DataFrame(index=pd.RangeIndex(len(indice_chaves)))
+    for parcial in (parcial_primeiros, parcial_somas):
+        if parcial is not None:
+            resultado = resultado.join(parcial)
+    for c in distintos:
+        unicos = np.unique(np.concatenate([pares_unicos[c], *pares_pendentes[c]]))
+        resultado[c] = np.bincount(unicos >> 32, minlength=len(indice_chaves))
+
+    resultado.index = indice_chaves
+    resultado = resultado.sort_index()[list(agregacao)]
+    resultado.index.name = chave
+    return resultado.reset_index()
+
+def _codificar(indice, valores):
+    # Códigos de "valores" em "indice"; valores ainda não vistos entram no fim do índice
+    if indice is None:
+        indice = pd.Index(valores.unique())
+    else:
+        unicos = pd.Index(valores.unique())
+        novos = unicos[indice.get_indexer(unicos) < 0]
+        if len(novos):
+            indice = indice.append(novos)
+    return indice, indice.get_indexer(valores)
+
+def carregar_visao_macro(filename=ARQUIVO_ALOCACOES, usar_snapshot=True, chunksize=None):
+    """
+    Carrega o arquivo de alocações e gera a visão macro (uma linha por colaborador).
+
+    Quando o snapshot binário foi gerado a partir do CSV atual (mesmo tamanho e
+    mtime) ele é usado diretamente; senão o CSV é agregado e o snapshot é regravado.
+
+    Parameters:
+    - filename (str): Caminho do CSV de alocações.
+    - usar_snapshot (bool): Se False, ignora e não grava o snapshot.
+    - chunksize (int or None): Se informado, agrega o CSV em blocos (ver agregar_em_blocos);
+      nesse modo só o snapshot da visão macro é gravado.
+
+    Returns:
+    - pd.DataFrame: Retorna o DataFrame da visão macro, com colunas de texto categóricas.
+    """
+    if usar_snapshot and snapshot_atualizado(filename, "visao_macro"):
+        try:
+            return carregar_snapshot(filename, "visao_macro")
+        except (OSError, ValueError):
+            pass  # versão trocada por outro processo durante a leitura: agrega de novo
+
+    # Identidade lida antes da agregação: se o CSV mudar no meio, o snapshot já nasce desatualizado
+    origem = identidade_arquivo(filename)
+    if chunksize:
+        alocamentos = None
+        visao_macro = codificar_categorias(_renomear_visao_macro(agregar_em_blocos(filename, AGREGACAO, chunksize=chunksize)))
+    else:
+        alocamentos = ler_csv_alocacoes(filename)
+        visao_macro = agregar_visao_macro(alocamentos)
+
+    if usar_snapshot:
+        try:
+            # Outro processo pode ter publicado o snapshot enquanto este agregava
+            if not snapshot_atualizado(filename, "visao_macro"):
+                salvar_snapshot(filename, alocamentos=alocamentos, visao_macro=visao_macro, origem=origem)
+            return carregar_snapshot(filename, "visao_macro")
+        except (OSError, ValueError):
+            pass
+    return visao_macro
+
+class CacheVisaoMacro:
+    """
+    Cache LRU da visão macro por arquivo de alocações.
+
+    A chave é a identidade do arquivo (caminho absoluto, mtime e tamanho, ou o
+    hash do conteúdo com usar_hash=True): enquanto o arquivo não muda, todas as
+    chamadas recebem o mesmo DataFrame agregado, que não deve ser modificado.
+    """
+    def __init__(self, max_arquivos=4, usar_hash=False, loader=carregar_visao_macro):
+        self.max_arquivos = max_arquivos
+        self.usar_hash = usar_hash
+        self.loader = loader
+        self.entradas = OrderedDict()  # caminho -> (identidade, visão macro)
+        self.hits = 0
+        self.misses = 0
+
+    def identidade(self, filename):
+        if self.usar_hash:
+            with open(filename, "rb") as arquivo:
+                return hashlib.sha1(arquivo.read()).hexdigest()
+        info = os.stat(filename)
+        return (info.st_mtime_ns, info.st_size)
+
+    def get(self, filename=ARQUIVO_ALOCACOES):
+        caminho = os.path.abspath(filename)
+        identidade = self.identidade(caminho)
+
+        entrada = self.entradas.get(caminho)
+        if entrada is not None and entrada[0] == identidade:
+            self.hits += 1
+            self.entradas.move_to_end(caminho)
+            return entrada[1]
+
+        self.misses += 1
+        visao_macro = self.loader(caminho)
+        self.entradas[caminho] = (identidade, visao_macro)
+        self.entradas.move_to_end(caminho)
+        while len(self.entradas) > self.max_arquivos:
+            self.entradas.popitem(last=False)
+        return visao_macro
+
+    def invalidate(self, filename=None):
+        if filename is None:
+            self.entradas.clear()
+        else:
+            self.entradas.pop(os.path.abspath(filename), None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "arquivos": len(self.entradas)}
+
+# Cache compartilhado pelos callbacks do app
+cache_visao_macro = CacheVisaoMacro()